@@ -1,20 +1,56 @@
 """Planning Agent - Analyzes queries and plans the ranking strategy."""
 
 from typing import Dict, List, Optional, Tuple
-import json
+import orjson
 import re
+from datetime import datetime
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage
 from config.state import RankingState, AgentOutput
 from config.settings import DOMAIN_SOURCE_RECOMMENDATIONS, SOURCE_CONFIGS
+from utils.llm_scheduler import LLMScheduler
+
+# Phrases meaning "let the system pick the metrics"
+_AUTO_RE = re.compile(
+    r'\b(?:pick|choose|auto|you\s+decide|you\s+choose|your\s+choice|select\s+for\s+me)\b',
+    re.I
+)
+
+
+def _source_option(source_type: str, recommended: bool) -> Dict[str, object]:
+    """Build a source option entry from SOURCE_CONFIGS."""
+    config = SOURCE_CONFIGS[source_type]
+    return {
+        "id": source_type,
+        "name": config["name"],
+        "description": config["description"],
+        "icon": config["icon"],
+        "recommended": recommended
+    }
+
+
+# domain -> (recommended options, other options), excluding the auto/custom entries
+_SOURCE_OPTIONS: Dict[str, Tuple[Tuple[Dict[str, object], ...], Tuple[Dict[str, object], ...]]] = {
+    domain: (
+        tuple(_source_option(st, True) for st in recommended_types if st in SOURCE_CONFIGS),
+        tuple(
+            _source_option(st, False) for st in SOURCE_CONFIGS
+            if st not in recommended_types and st != "auto"
+        )
+    )
+    for domain, recommended_types in DOMAIN_SOURCE_RECOMMENDATIONS.items()
+}
 
 class PlanningAgent:
     """Agent responsible for understanding the query and planning the ranking approach."""
     
-    def __init__(self, llm: ChatGroq):
+    def __init__(self, llm: LLMScheduler, cached_model: Optional[ChatGroq] = None):
         self.llm = llm
+        # Answers planning prompts from the completion cache; plan_and_score
+        # produces scores, so it always uses the scheduler's uncached model
+        self.cached_model = cached_model
         
-    def analyze_query(self, state: RankingState) -> RankingState:
+    async def analyze_query(self, state: RankingState) -> RankingState:
         """Analyze the user query to extract domain, entity type, region, time scope, and number of items."""
         query = state.get("query", "")
         
@@ -42,9 +78,9 @@ Example: {{"domain": "gaming", "entity_type": "clash royale players", "region":
         
         try:
             messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages, model=self.cached_model)
             content = self._clean_json(response.content)
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             state["domain"] = result.get("domain", "general")
             state["entity_type"] = result.get("entity_type")
@@ -60,7 +96,7 @@ Example: {{"domain": "gaming", "entity_type": "clash royale players", "region":
             
         return state
     
-    def select_metrics(self, state: RankingState) -> RankingState:
+    async def select_metrics(self, state: RankingState) -> RankingState:
         """Select appropriate ranking metrics based on domain and entity type."""
         domain = state.get("domain", "general")
         entity_type = state.get("entity_type", "items")
@@ -84,9 +120,9 @@ Example: {{"metrics": ["skill_rating", "tournament_wins", "consistency"], "weigh
         
         try:
             messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages, model=self.cached_model)
             content = self._clean_json(response.content)
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             state["metrics"] = result.get("metrics", ["quality", "popularity", "relevance"])
             state["weights"] = result.get("weights", {})
@@ -99,40 +135,110 @@ Example: {{"metrics": ["skill_rating", "tournament_wins", "consistency"], "weigh
             
         return state
     
+    async def plan_and_score(self, state: RankingState) -> RankingState:
+        """Pick metrics (unless already chosen) and score all known candidates in one LLM call.
+        
+        On failure ``state["scores"]`` is left unset so the caller can fall back
+        to the separate collect/score steps.
+        """
+        domain = state.get("domain", "general")
+        entity_type = state.get("entity_type", "items")
+        candidates = state.get("candidates", [])
+        metrics = state.get("metrics")
+        weights = state.get("weights", {})
+        
+        if not candidates:
+            return state
+        
+        if metrics:
+            metric_instructions = (
+                f"Use exactly these metrics: {', '.join(metrics)}\n"
+                f"Use exactly these weights: {orjson.dumps(weights).decode()}"
+            )
+        else:
+            metric_instructions = (
+                "Select 3-5 highly relevant ranking metrics that are SPECIFIC and MEASURABLE "
+                "(lowercase, underscore-separated) with weights that sum to 1.0."
+            )
+        
+        prompt = f"""Rank these "{entity_type}" in the "{domain}" domain.
+
+Candidates: {orjson.dumps(candidates).decode()}
+
+{metric_instructions}
+
+Score every candidate on every metric between 0.0 and 1.0 where:
+- 1.0 = Exceptional/Best in class
+- 0.7-0.9 = Very good
+- 0.5-0.7 = Good/Average
+- 0.3-0.5 = Below average
+- 0.0-0.3 = Poor
+
+Return ONLY a JSON object with:
+- "metrics": list of metric names
+- "weights": object mapping each metric to a weight (sum to 1.0)
+- "scores": object mapping each candidate name (exactly as given) to an object of metric scores
+
+Example: {{"metrics": ["skill_rating", "consistency"], "weights": {{"skill_rating": 0.6, "consistency": 0.4}}, "scores": {{"Entity 1": {{"skill_rating": 0.85, "consistency": 0.72}}}}}}
+"""
+        
+        try:
+            messages = [HumanMessage(content=prompt)]
+            response = await self.llm.ainvoke(messages)
+            content = self._clean_json(response.content)
+            result = orjson.loads(content)
+            
+            raw_scores = result.get("scores")
+            if not isinstance(raw_scores, dict) or not raw_scores:
+                raise ValueError("response has no scores")
+            
+            if not metrics:
+                metrics = result.get("metrics") or []
+                weights = result.get("weights", {})
+                if not metrics:
+                    raise ValueError("response has no metrics")
+            
+            # Renamed candidates or metric keys would otherwise become all-0.5
+            # rows; raising sends the caller to the decomposed steps instead
+            missing_candidates = [c for c in candidates if not isinstance(raw_scores.get(c), dict)]
+            if missing_candidates:
+                raise ValueError(f"response has no scores for {missing_candidates}")
+            
+            scored_metrics = set()
+            for candidate in candidates:
+                scored_metrics.update(raw_scores[candidate])
+            missing_metrics = [m for m in metrics if m not in scored_metrics]
+            if missing_metrics:
+                raise ValueError(f"response has no scores for metrics {missing_metrics}")
+            
+            # Only genuinely partial gaps (a candidate missing one metric) are filled
+            scores = {}
+            for candidate in candidates:
+                candidate_scores = raw_scores[candidate]
+                scores[candidate] = {m: float(candidate_scores.get(m, 0.5)) for m in metrics}
+            
+            state["metrics"] = metrics
+            state["weights"] = weights
+            state["scores"] = scores
+            state["raw_data"] = {}
+            state["source_map"] = {}
+            state["last_updated"] = datetime.now()
+            
+            print(f"✓ Planned and scored {len(candidates)} candidates on {len(metrics)} metrics in one call")
+            
+        except Exception as e:
+            print(f"✗ Error in combined planning and scoring: {e}")
+            
+        return state
+    
     def recommend_sources(self, state: RankingState) -> Dict[str, any]:
         """Recommend source types based on domain and entity type."""
         domain = state.get("domain", "general")
         entity_type = state.get("entity_type", "items")
         
-        # Get domain-specific recommendations
-        recommended_types = DOMAIN_SOURCE_RECOMMENDATIONS.get(
-            domain.lower(), 
-            DOMAIN_SOURCE_RECOMMENDATIONS["default"]
-        )
-        
-        # Build source options for user
-        source_options = []
-        for source_type in recommended_types:
-            if source_type in SOURCE_CONFIGS:
-                config = SOURCE_CONFIGS[source_type]
-                source_options.append({
-                    "id": source_type,
-                    "name": config["name"],
-                    "description": config["description"],
-                    "icon": config["icon"],
-                    "recommended": True
-                })
-        
-        # Add other sources as non-recommended
-        for source_type, config in SOURCE_CONFIGS.items():
-            if source_type not in recommended_types and source_type != "auto":
-                source_options.append({
-                    "id": source_type,
-                    "name": config["name"],
-                    "description": config["description"],
-                    "icon": config["icon"],
-                    "recommended": False
-                })
+        # Partitions are precomputed per domain at import time
+        recommended, other = _SOURCE_OPTIONS.get(domain.lower(), _SOURCE_OPTIONS["default"])
+        source_options = [*recommended, *other]
         
         # Add auto and custom options
         source_options.insert(0, {
@@ -153,13 +259,12 @@ Example: {{"metrics": ["skill_rating", "tournament_wins", "consistency"], "weigh
         
         return {
             "source_options": source_options,
-            "recommended_count": len([s for s in source_options if s.get("recommended")])
+            "recommended_count": len(recommended) + 1  # Plus the auto option
         }
     
-    def parse_custom_metrics(self, user_message: str) -> Tuple[Optional[List[str]], Optional[Dict[str, float]]]:
+    async def parse_custom_metrics(self, user_message: str) -> Tuple[Optional[List[str]], Optional[Dict[str, float]]]:
         """Parse user's custom metrics from natural language."""
-        auto_keywords = ["pick", "choose", "auto", "you decide", "you choose", "your choice", "select for me"]
-        if any(keyword in user_message.lower() for keyword in auto_keywords):
+        if _AUTO_RE.search(user_message):
             return None, None
         
         prompt = f"""Extract ranking metrics from this message.
@@ -177,9 +282,9 @@ Return ONLY valid JSON.
         
         try:
             messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages, model=self.cached_model)
             content = self._clean_json(response.content)
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             if result.get("wants_auto"):
                 return None, None
@@ -1,22 +1,31 @@
 """Research Agent - Collects data from various sources."""
 
-from typing import Dict, List, Optional
-import json
-import time
+from typing import Dict, List, Optional, Tuple
+import orjson
+import asyncio
 import re
 from datetime import datetime
-from langchain_groq import ChatGroq
+from cachetools import TTLCache
 from langchain_core.messages import HumanMessage
 from config.state import RankingState
-from config.settings import SOURCE_CONFIGS, RATE_LIMIT_DELAY, MAX_SOURCES_PER_CANDIDATE
+from config.settings import SOURCE_CONFIGS, MAX_SOURCES_PER_CANDIDATE, CACHE_DURATION
+from utils.single_flight import coalesce
+from utils.llm_scheduler import LLMScheduler
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Research results shared across chats: (candidate, entity_type, source_types) -> (data, sources)
+_RESEARCH_CACHE = TTLCache(maxsize=4096, ttl=CACHE_DURATION)
 
 class ResearchAgent:
     """Agent responsible for researching candidates and collecting data from sources."""
     
-    def __init__(self, llm: ChatGroq):
+    def __init__(self, llm: LLMScheduler):
         self.llm = llm
+        # Research calls in flight, keyed like _RESEARCH_CACHE
+        self._inflight: Dict[tuple, asyncio.Future] = {}
         
-    def generate_candidates(self, state: RankingState) -> RankingState:
+    async def generate_candidates(self, state: RankingState) -> RankingState:
         """Generate a list of candidate entities to rank."""
         entity_type = state.get("entity_type", "items")
         region = state.get("region", "global")
@@ -41,10 +50,10 @@ Example: ["Entity 1", "Entity 2", "Entity 3", ...]
         
         try:
             messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             content = self._clean_json(response.content)
             
-            candidates = json.loads(content)
+            candidates = orjson.loads(content)
             state["candidates"] = candidates[:num_to_generate]
             
             print(f"✓ Generated {len(state['candidates'])} candidates")
@@ -55,8 +64,12 @@ Example: ["Entity 1", "Entity 2", "Entity 3", ...]
             
         return state
     
-    def collect_data(self, state: RankingState) -> RankingState:
-        """Collect data from selected sources for each candidate."""
+    async def collect_data(self, state: RankingState, refresh: bool = False) -> RankingState:
+        """Collect data from selected sources for each candidate.
+        
+        With refresh=True cached research is ignored and overwritten, so a
+        user-requested refresh really re-checks every candidate.
+        """
         candidates = state.get("candidates", [])
         source_types = state.get("source_types", ["auto"])
         explicit_urls = state.get("explicit_source_urls", [])
@@ -77,25 +90,32 @@ Example: ["Entity 1", "Entity 2", "Entity 3", ...]
             source_types = self._auto_select_sources(domain)
             print(f"✓ Auto-selected sources: {', '.join(source_types)}")
         
-        # Collect data for each candidate
-        raw_data = {}
-        source_map = {}
+        # Candidate-independent work is done once per call
+        source_context = self._build_source_context(source_types)
+        source_templates = self._build_source_templates(source_types)
+        source_key = tuple(sorted(source_types))
         
-        for candidate in candidates:
-            print(f"  Researching: {candidate}")
-            
-            # Simulate web research (in production, use actual web scraping)
-            data, sources = self._research_candidate(
+        # Research all candidates concurrently (admission is up to the LLMScheduler)
+        # Simulate web research (in production, use actual web scraping)
+        results = await asyncio.gather(*[
+            self._research_candidate(
                 candidate, 
                 entity_type, 
-                source_types,
-                state
+                source_context,
+                source_templates,
+                source_key,
+                state,
+                refresh
             )
-            
+            for candidate in candidates
+        ])
+        
+        raw_data = {}
+        source_map = {}
+        
+        for candidate, (data, sources) in zip(candidates, results):
             raw_data[candidate] = data
             source_map[candidate] = sources
-            
-            time.sleep(RATE_LIMIT_DELAY)
         
         state["raw_data"] = raw_data
         state["source_map"] = source_map
@@ -105,18 +125,39 @@ Example: ["Entity 1", "Entity 2", "Entity 3", ...]
         
         return state
     
-    def _research_candidate(
+    async def _research_candidate(
         self, 
         candidate: str, 
         entity_type: str,
-        source_types: List[str],
-        state: RankingState
+        source_context: str,
+        source_templates: List[Tuple[str, str, str, str]],
+        source_key: Tuple[str, ...],
+        state: RankingState,
+        refresh: bool = False
     ) -> tuple[str, List[Dict[str, str]]]:
         """Research a single candidate using LLM knowledge."""
         
-        # Build context from source types
-        source_context = self._build_source_context(source_types)
+        cache_key = (candidate.lower(), str(entity_type).lower(), source_key)
+        if not refresh and cache_key in _RESEARCH_CACHE:
+            return _RESEARCH_CACHE[cache_key]
         
+        # Duplicate candidates (or another chat researching the same one)
+        # wait for the call already in flight instead of asking again
+        return await coalesce(
+            self._inflight,
+            cache_key,
+            lambda: self._ask_research(candidate, entity_type, source_context, source_templates, cache_key)
+        )
+    
+    async def _ask_research(
+        self,
+        candidate: str,
+        entity_type: str,
+        source_context: str,
+        source_templates: List[Tuple[str, str, str, str]],
+        cache_key: tuple
+    ) -> tuple[str, List[Dict[str, str]]]:
+        """Ask the LLM to research a candidate and cache the result."""
         prompt = f"""Research "{candidate}" as a {entity_type} and provide detailed information.
 
 Focus on these aspects based on source types: {source_context}
@@ -130,14 +171,17 @@ Provide:
 Return comprehensive information that would help evaluate this {entity_type}.
 """
         
+        print(f"  Researching: {candidate}")
+        
         try:
             messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             data = response.content
             
             # Generate source references
-            sources = self._generate_source_references(candidate, entity_type, source_types)
+            sources = self._generate_source_references(candidate, source_templates)
             
+            _RESEARCH_CACHE[cache_key] = (data, sources)
             return data, sources
             
         except Exception as e:
@@ -200,29 +244,34 @@ Return comprehensive information that would help evaluate this {entity_type}.
                 contexts.append(SOURCE_CONFIGS[stype]["name"])
         return ", ".join(contexts) if contexts else "general sources"
     
+    def _build_source_templates(self, source_types: List[str]) -> List[Tuple[str, str, str, str]]:
+        """Precompute (source_type, name, icon, domain) tuples for source references."""
+        templates = []
+        for stype in source_types[:MAX_SOURCES_PER_CANDIDATE]:
+            if stype in SOURCE_CONFIGS:
+                config = SOURCE_CONFIGS[stype]
+                domain = config["domains"][0] if config["domains"] else "example.com"
+                templates.append((stype, config["name"], config["icon"], domain))
+        return templates
+    
     def _generate_source_references(
         self, 
         candidate: str, 
-        entity_type: str, 
-        source_types: List[str]
+        source_templates: List[Tuple[str, str, str, str]]
     ) -> List[Dict[str, str]]:
         """Generate realistic source references."""
-        sources = []
-        
-        for stype in source_types[:MAX_SOURCES_PER_CANDIDATE]:
-            if stype in SOURCE_CONFIGS:
-                config = SOURCE_CONFIGS[stype]
-                domain = config["domains"][0] if config["domains"] else "example.com"
-                
-                sources.append({
-                    "url": f"https://{domain}/{candidate.lower().replace(' ', '-')}",
-                    "title": f"{candidate} - {config['name']}",
-                    "source_type": stype,
-                    "domain": domain,
-                    "icon": config["icon"]
-                })
+        slug = _WHITESPACE_RE.sub('-', candidate.lower())
         
-        return sources
+        return [
+            {
+                "url": f"https://{domain}/{slug}",
+                "title": f"{candidate} - {name}",
+                "source_type": stype,
+                "domain": domain,
+                "icon": icon
+            }
+            for stype, name, icon, domain in source_templates
+        ]
     
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL."""
@@ -1,22 +1,101 @@
 """Scoring Agent - Scores candidates and detects ranking changes."""
 
 from typing import Dict, List, Optional
-import json
+import asyncio
+import hashlib
+from collections import defaultdict
+import orjson
+import numpy as np
 import pandas as pd
+import threading
 from datetime import datetime
-from langchain_groq import ChatGroq
+from cachetools import TTLCache
 from langchain_core.messages import HumanMessage
 from config.state import RankingState
-from config.settings import CHANGE_DETECTION_THRESHOLD
+from config.settings import (
+    CHANGE_DETECTION_THRESHOLD,
+    CACHE_DURATION,
+    SCORING_CONTEXT_TOKENS,
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_INPUT_TOKENS
+)
+from utils.single_flight import coalesce
+from utils.llm_scheduler import LLMScheduler
+from utils.helpers import format_metric_display
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    print("⚠️  tiktoken not available, estimating tokens from characters. Install with: pip install tiktoken")
+
+# Scores shared across chats: (candidate, entity_type, metrics, data_hash) -> {metric: score}
+_SCORE_CACHE = TTLCache(maxsize=4096, ttl=CACHE_DURATION)
+
+# Candidate fact-sheet summaries: data_hash -> summary text
+_SUMMARY_CACHE = TTLCache(maxsize=4096, ttl=CACHE_DURATION)
+
+# Rough characters per token, used when the tiktoken encoding cannot be loaded
+_CHARS_PER_TOKEN = 4
+
+# cl100k only approximates the Groq model tokenizer, which is enough for budgeting
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    """Load the tiktoken encoding on first use; None if it cannot be loaded.
+    
+    tiktoken downloads the encoding file the first time, so this must not run
+    at import: without network access the API would fail to start.
+    """
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            if TIKTOKEN_AVAILABLE:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    print(f"⚠️  tiktoken encoding unavailable ({e}), estimating tokens from characters")
+        return _encoding
+
+def _count_tokens(text: str) -> int:
+    """Count (or estimate) the tokens in text."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to a token budget."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * _CHARS_PER_TOKEN]
+    
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+def _scores_frame(scores: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    """Convert candidate -> {metric: score} dicts into a candidate x metric frame."""
+    return pd.DataFrame.from_dict(scores, orient="index", dtype=float)
 
 class ScoringAgent:
     """Agent responsible for scoring candidates and generating rankings."""
     
-    def __init__(self, llm: ChatGroq):
+    def __init__(self, llm: LLMScheduler):
         self.llm = llm
+        # Scoring calls in flight, keyed like _SCORE_CACHE
+        self._inflight: Dict[tuple, asyncio.Future] = {}
         
-    def score_candidates(self, state: RankingState) -> RankingState:
-        """Score each candidate on each metric using collected data."""
+    async def score_candidates(self, state: RankingState, refresh: bool = False) -> RankingState:
+        """Score each candidate on each metric using collected data.
+        
+        With refresh=True cached scores are ignored and overwritten.
+        """
         candidates = state.get("candidates", [])
         metrics = state.get("metrics", [])
         raw_data = state.get("raw_data", {})
@@ -26,22 +105,19 @@ class ScoringAgent:
             state["errors"] = state.get("errors", []) + ["Missing candidates or metrics"]
             return state
         
-        scores = {}
-        
-        for candidate in candidates:
-            candidate_data = raw_data.get(candidate, "")
-            
-            # Score this candidate on all metrics
-            candidate_scores = self._score_single_candidate(
+        # Score all candidates concurrently (admission is up to the LLMScheduler)
+        results = await asyncio.gather(*[
+            self._score_single_candidate(
                 candidate, 
-                candidate_data,
+                raw_data.get(candidate, ""),
                 metrics,
-                entity_type
+                entity_type,
+                refresh
             )
-            
-            scores[candidate] = candidate_scores
+            for candidate in candidates
+        ])
         
-        state["scores"] = scores
+        state["scores"] = dict(zip(candidates, results))
         
         print(f"✓ Scored {len(candidates)} candidates on {len(metrics)} metrics")
         
@@ -59,34 +135,27 @@ class ScoringAgent:
             state["errors"] = state.get("errors", []) + ["No scores available"]
             return state
         
-        # Build DataFrame
-        rows = []
-        for candidate in candidates:
-            candidate_scores = scores.get(candidate, {})
-            row = {"Name": candidate}
-            
-            for metric in metrics:
-                row[metric] = candidate_scores.get(metric, 0.0)
-            
-            # Calculate weighted total
-            total = sum(
-                candidate_scores.get(m, 0.0) * weights.get(m, 0.0) 
-                for m in metrics
-            )
-            row["Total Score"] = round(total, 3)
-            
-            rows.append(row)
-        
-        df = pd.DataFrame(rows)
-        df = df.sort_values("Total Score", ascending=False).reset_index(drop=True)
-        
-        # Store full dataframe
-        state["full_table"] = df.copy()
-        
-        # Create display version with ranks
-        df_display = df.head(num_items).copy()
-        df_display.index = df_display.index + 1
-        df_display.insert(0, "Rank", df_display.index)
+        # Build score matrix (candidates x metrics) and weighted totals.
+        # Scoring always fills every metric, so cells are read directly.
+        score_matrix = np.array(
+            [[scores[c][m] for m in metrics] for c in candidates],
+            dtype=float
+        ).reshape(len(candidates), len(metrics))
+        weight_vector = np.array([weights.get(m, 0.0) for m in metrics], dtype=float)
+        totals = np.round(score_matrix @ weight_vector, 3)
+        
+        # One stable order (ties keep candidate order) serves both the chat
+        # display and the download, so the two always agree
+        order = np.argsort(-totals, kind="stable")
+        df = pd.DataFrame(score_matrix[order], columns=metrics)
+        df.insert(0, "Name", [candidates[i] for i in order])
+        df["Total Score"] = totals[order]
+        df.index = df.index + 1
+        df.insert(0, "Rank", df.index)
+        state["full_table"] = df
+        
+        # Display version is the top-K rows of the ranked table
+        df_display = df.head(num_items)
         
         state["final_table"] = df_display
         state["total_available"] = len(df)
@@ -105,9 +174,31 @@ class ScoringAgent:
             state["changes_detected"] = {}
             return state
         
+        # Align both runs as candidate x metric frames and compare in one pass.
+        # Metrics missing from the previous run count as 0.0; metrics missing
+        # from the current run are NaN and never register as a change.
+        curr_df = _scores_frame(current_scores)
+        prev_df = _scores_frame(previous_scores)
+        common = curr_df.index[curr_df.index.isin(prev_df.index)]
+        curr = curr_df.loc[common]
+        prev = prev_df.reindex(index=common, columns=curr_df.columns).fillna(0.0)
+        diff = curr - prev
+        
+        rows, cols = np.nonzero((diff.abs() >= CHANGE_DETECTION_THRESHOLD).to_numpy())
+        metric_changes_by_candidate = defaultdict(dict)
+        for row, col in zip(rows, cols):
+            prev_value = float(prev.iat[row, col])
+            change = float(diff.iat[row, col])
+            metric_changes_by_candidate[common[row]][curr.columns[col]] = {
+                "previous": prev_value,
+                "current": float(curr.iat[row, col]),
+                "change": change,
+                "percent_change": (change / prev_value * 100) if prev_value > 0 else 0
+            }
+        
         changes = {}
         
-        for candidate, curr_scores in current_scores.items():
+        for candidate in current_scores:
             if candidate not in previous_scores:
                 # New candidate
                 changes[candidate] = {
@@ -116,22 +207,7 @@ class ScoringAgent:
                 }
                 continue
             
-            prev_scores = previous_scores[candidate]
-            
-            # Check each metric for significant changes
-            metric_changes = {}
-            for metric, curr_value in curr_scores.items():
-                prev_value = prev_scores.get(metric, 0.0)
-                diff = curr_value - prev_value
-                
-                if abs(diff) >= CHANGE_DETECTION_THRESHOLD:
-                    metric_changes[metric] = {
-                        "previous": prev_value,
-                        "current": curr_value,
-                        "change": diff,
-                        "percent_change": (diff / prev_value * 100) if prev_value > 0 else 0
-                    }
-            
+            metric_changes = metric_changes_by_candidate.get(candidate)
             if metric_changes:
                 changes[candidate] = {
                     "type": "updated",
@@ -156,19 +232,45 @@ class ScoringAgent:
         
         return state
     
-    def _score_single_candidate(
+    async def _score_single_candidate(
         self,
         candidate: str,
         candidate_data: str,
         metrics: List[str],
-        entity_type: str
+        entity_type: str,
+        refresh: bool = False
     ) -> Dict[str, float]:
         """Score a single candidate on all metrics."""
         
+        data_hash = hashlib.sha1(candidate_data.encode("utf-8")).hexdigest()
+        cache_key = (candidate.lower(), str(entity_type).lower(), tuple(metrics), data_hash)
+        if not refresh and cache_key in _SCORE_CACHE:
+            return dict(_SCORE_CACHE[cache_key])
+        
+        # Identical scoring requests already in flight share one LLM call
+        scores = await coalesce(
+            self._inflight,
+            cache_key,
+            lambda: self._ask_scores(candidate, candidate_data, metrics, entity_type, data_hash, cache_key)
+        )
+        return dict(scores)
+    
+    async def _ask_scores(
+        self,
+        candidate: str,
+        candidate_data: str,
+        metrics: List[str],
+        entity_type: str,
+        data_hash: str,
+        cache_key: tuple
+    ) -> Dict[str, float]:
+        """Ask the LLM to score a candidate and cache the result."""
+        context = await self._summarize(candidate, candidate_data, data_hash)
+        
         prompt = f"""Score "{candidate}" (a {entity_type}) on these metrics: {', '.join(metrics)}
 
 Available information:
-{candidate_data[:2000]}  # Truncate to avoid token limits
+{context}
 
 For each metric, provide a score between 0.0 and 1.0 where:
 - 1.0 = Exceptional/Best in class
@@ -183,16 +285,17 @@ Example: {{"metric1": 0.85, "metric2": 0.72, "metric3": 0.91}}
         
         try:
             messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             content = self._clean_json(response.content)
             
-            scores = json.loads(content)
+            scores = orjson.loads(content)
             
-            # Ensure all metrics have scores
+            # Ensure all metrics have scores (generate_ranking relies on this)
             for metric in metrics:
                 if metric not in scores:
                     scores[metric] = 0.5  # Default to middle score
             
+            _SCORE_CACHE[cache_key] = dict(scores)
             return scores
             
         except Exception as e:
@@ -200,6 +303,36 @@ Example: {{"metric1": 0.85, "metric2": 0.72, "metric3": 0.91}}
             # Return default scores
             return {m: 0.5 for m in metrics}
     
+    async def _summarize(self, candidate: str, candidate_data: str, data_hash: str) -> str:
+        """Condense candidate data into a fact sheet that fits the scoring token budget."""
+        # The first call may download the encoding file; keep that off the event loop
+        await asyncio.to_thread(_get_encoding)
+        if _count_tokens(candidate_data) <= SCORING_CONTEXT_TOKENS:
+            return candidate_data
+        
+        if data_hash in _SUMMARY_CACHE:
+            return _SUMMARY_CACHE[data_hash]
+        
+        prompt = f"""Summarize the information below about "{candidate}" as concise bullet-point facts.
+
+Keep key statistics, achievements, recent developments, and expert opinions.
+Use at most {SUMMARY_MAX_TOKENS} tokens.
+
+Information:
+{_truncate_tokens(candidate_data, SUMMARY_INPUT_TOKENS)}
+"""
+        
+        try:
+            messages = [HumanMessage(content=prompt)]
+            response = await self.llm.ainvoke(messages)
+            summary = _truncate_tokens(response.content.strip(), SCORING_CONTEXT_TOKENS)
+            _SUMMARY_CACHE[data_hash] = summary
+            return summary
+            
+        except Exception as e:
+            print(f"✗ Error summarizing {candidate}: {e}")
+            return _truncate_tokens(candidate_data, SCORING_CONTEXT_TOKENS)
+    
     def _generate_change_message(
         self, 
         candidate: str, 
@@ -213,15 +346,14 @@ Example: {{"metric1": 0.85, "metric2": 0.72, "metric3": 0.91}}
             direction = "increased" if change > 0 else "decreased"
             percent = abs(change_data["percent_change"])
             
-            metric_display = metric.replace("_", " ").title()
             messages.append(
-                f"{metric_display} {direction} by {percent:.1f}% "
+                f"{format_metric_display(metric)} {direction} by {percent:.1f}% "
                 f"({change_data['previous']:.2f} → {change_data['current']:.2f})"
             )
         
         return f"{candidate}: " + "; ".join(messages)
     
-    def generate_change_summary(self, state: RankingState) -> Optional[str]:
+    def generate_change_summary(self, state: RankingState, now: Optional[datetime] = None) -> Optional[str]:
         """Generate a user-friendly summary of detected changes."""
         changes = state.get("changes_detected", {})
         
@@ -248,7 +380,7 @@ Example: {{"metric1": 0.85, "metric2": 0.72, "metric3": 0.91}}
         if removed_entries:
             summary_parts.append(f"\n❌ **Removed:** {', '.join(removed_entries)}")
         
-        summary_parts.append(f"\n\n_Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_")
+        summary_parts.append(f"\n\n_Last updated: {(now or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}_")
         
         return "\n".join(summary_parts)
     
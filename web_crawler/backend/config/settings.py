@@ -1,5 +1,6 @@
 """Configuration settings for the ranking system."""
 
+import os
 from typing import Dict, List
 from enum import Enum
 
@@ -94,12 +95,31 @@ DOMAIN_SOURCE_RECOMMENDATIONS: Dict[str, List[str]] = {
 # Rate limiting and caching settings
 RATE_LIMIT_DELAY = 2  # seconds between requests
 CACHE_DURATION = 3600  # 1 hour in seconds
+HTTP_CACHE_DIR = ".crawl_cache"  # On-disk cache of crawled pages
+LLM_CACHE_DIR = ".llm_cache"  # On-disk cache of LLM completions for repeated prompts
 MAX_SOURCES_PER_CANDIDATE = 5
+REDIS_URL = os.getenv("REDIS_URL")  # Shared chat storage for multi-worker deployments
+CHAT_TTL = 86400  # Seconds a stored chat survives without activity
+CHAT_LOCK_TIMEOUT = 600  # Max seconds one chat turn may hold the chat's lock
 REQUEST_TIMEOUT = 15  # seconds
+DRIVER_POOL_SIZE = 4  # Headless Chrome instances for JS-rendered pages
+PER_HOST_CONCURRENCY = 2  # Concurrent page fetches per host during a crawl
+SELENIUM_SEARCH_FALLBACK = True  # Search Google in Chrome when the HTTP search finds nothing
 
 # LLM Settings
 DEFAULT_TEMPERATURE = 0.7
 MAX_RETRIES = 3
+LLM_REQUEST_TIMEOUT = 60  # seconds per Groq API request
+LLM_MAX_CONCURRENCY = 16  # LLM calls in flight for the whole app; each worker gets its share
+LLM_REQUESTS_PER_MINUTE = 240  # LLM calls started per minute for the whole app; each worker gets its share
+WORKER_COUNT = int(os.getenv("WEB_CONCURRENCY", "1"))  # uvicorn workers splitting the LLM limits (uvicorn reads the same variable)
+LLM_PRIORITY_CHARS_PER_SECOND = 4000  # Prompt length that waits one second longer than an empty prompt when queued
+SCORING_CONTEXT_TOKENS = 500  # Token budget for candidate data in scoring prompts
+SUMMARY_MAX_TOKENS = 256  # Target length of candidate fact-sheet summaries
+SUMMARY_INPUT_TOKENS = 4000  # Max candidate data sent to the summarizer
+INSIGHT_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # Embeds insight questions
+INSIGHT_CACHE_SIMILARITY = 0.9  # Cosine similarity at which a cached insight answer is reused
+INSIGHT_TABLE_ROWS = 20  # Ranking rows included verbatim in insight prompts
 
 # Dynamic ranking settings
 DYNAMIC_RANKING_ENABLED = True
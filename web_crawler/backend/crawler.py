@@ -14,11 +14,23 @@ Usage:
     )
 """
 
-from typing import List, Dict, Optional
-import time
+from typing import List, Dict, Mapping, Optional, Tuple
+import asyncio
+import atexit
+import queue
+import threading
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
-from urllib.parse import urlparse, quote_plus
+from urllib.parse import urlsplit, parse_qs, quote_plus
+from html import unescape
+
+import httpx
+from aiolimiter import AsyncLimiter
 
 try:
     from selenium import webdriver
@@ -39,79 +51,401 @@ try:
 except ImportError:
     WEBDRIVER_MANAGER_AVAILABLE = False
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 
 # Import source configurations
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from config.settings import SOURCE_CONFIGS, RATE_LIMIT_DELAY, MAX_SOURCES_PER_CANDIDATE
+from config.settings import (
+    SOURCE_CONFIGS,
+    RATE_LIMIT_DELAY,
+    MAX_SOURCES_PER_CANDIDATE,
+    REQUEST_TIMEOUT,
+    DRIVER_POOL_SIZE,
+    SELENIUM_SEARCH_FALLBACK,
+    PER_HOST_CONCURRENCY
+)
+from utils import http_cache
 
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+HTTP_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Language': 'en-US,en;q=0.9',
+}
 
-class WebCrawler:
-    """Advanced web crawler with source type filtering."""
+# Pages yielding less text than this over plain HTTP are assumed to need JS rendering
+MIN_TEXT_CHARS = 200
+MAX_TEXT_CHARS = 5000
+
+# HTML read per page; 64KB typically holds far more than MAX_TEXT_CHARS of text
+MAX_HTML_BYTES = 65536
+STREAM_CHUNK_BYTES = 16384
+
+# Decode explicitly so documents declaring their own encoding still parse
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# Visible text nodes, skipping non-content tags in the same pass
+_VISIBLE_TEXT_XPATH = etree.XPath(
+    "//body//text()[not(ancestor::script or ancestor::style or ancestor::noscript"
+    " or ancestor::iframe or ancestor::nav or ancestor::footer"
+    " or ancestor::header or ancestor::aside)]"
+)
+
+# Rendered text of a Chrome page, whitespace-collapsed and cut to arguments[0] chars
+_INNER_TEXT_SCRIPT = (
+    "const body = document.body;"
+    "return body ? body.innerText.replace(/\\s+/g, ' ').trim().slice(0, arguments[0]) : '';"
+)
+
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.I | re.S)
+# End of the document head; <title>s after it belong to inline SVGs, not the page
+_HEAD_END_RE = re.compile(r'</head\s*>|<body[\s>]', re.I)
+
+SEARCH_URL = "https://html.duckduckgo.com/html/?q={query}"
+GOOGLE_SEARCH_URL = "https://www.google.com/search?q={query}"
+_SEARCH_RESULT_XPATH = etree.XPath('//a[contains(@class, "result__a")]/@href')
+
+# Resources the crawler never reads; blocked in Chrome to cut page weight
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.mp3',
+]
+
+
+def _build_domain_pattern(domains: List[str]) -> "re.Pattern[str]":
+    """Compile a matcher for hosts equal to, or subdomains of, any of `domains`."""
+    alternation = '|'.join(re.escape(domain.lstrip('.')) for domain in domains)
+    return re.compile(rf'(?:^|\.)(?:{alternation})(?::\d+)?$', re.I)
+
+
+@dataclass(frozen=True, slots=True)
+class SourceConfig:
+    """Immutable crawl view of a SOURCE_CONFIGS entry."""
+    name: str
+    domains: Tuple[str, ...]
+    suffix: str
+    icon: str
+    domain_re: Optional["re.Pattern[str]"]  # None when any domain is allowed
+
+
+# Frozen once at import so hot crawl paths use attribute access, not dict .get()
+CRAWL_SOURCES: Dict[str, SourceConfig] = {
+    source_type: SourceConfig(
+        name=config['name'],
+        domains=tuple(config.get('domains', [])),
+        suffix=config.get('search_suffix', ''),
+        icon=config.get('icon', '📄'),
+        domain_re=_build_domain_pattern(config['domains']) if config.get('domains') else None
+    )
+    for source_type, config in SOURCE_CONFIGS.items()
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SourcePlan:
+    """A source type resolved once per crawl, carrying only what the hot paths read."""
+    source_type: str
+    suffix: str
+    domain_re: Optional["re.Pattern[str]"]
+    icon: str
+
+
+@lru_cache(maxsize=4096)
+def _extract_domain(url: str) -> str:
+    """Extract domain from URL."""
+    try:
+        return urlsplit(url).netloc
+    except ValueError:
+        return "unknown.com"
+
+
+async def _fetch(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    max_bytes: Optional[int] = None
+) -> Tuple[int, Mapping[str, str], str, bool]:
+    """Fetch a URL and return (status, response headers, HTML, truncated).
     
-    def __init__(self):
-        """Initialize the web crawler."""
-        if not SELENIUM_AVAILABLE:
-            raise RuntimeError("Selenium is required. Install with: pip install selenium webdriver-manager")
+    When `max_bytes` is given the body is streamed and reading stops once the
+    budget is reached; `truncated` tells whether more of the body remained.
+    A 304 Not Modified response is returned with an empty body.
+    """
+    async with client.stream('GET', url, headers=headers) as resp:
+        if resp.status_code == 304:
+            return resp.status_code, resp.headers, "", False
+        resp.raise_for_status()
+        
+        if max_bytes is None:
+            await resp.aread()
+            return resp.status_code, resp.headers, resp.text, False
+        
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in resp.aiter_bytes(STREAM_CHUNK_BYTES):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                # Leaving the stream early closes the response without reading the rest
+                truncated = True
+                break
         
-        self.driver = None
+        body = b''.join(chunks)[:max_bytes]
+        
+        try:
+            html = body.decode(resp.charset_encoding or 'utf-8', errors='replace')
+        except LookupError:
+            html = body.decode('utf-8', errors='replace')
+        
+        return resp.status_code, resp.headers, html, truncated
+
+
+def _parse_html(html: str) -> str:
+    """Extract visible text from an HTML document."""
+    if not html or html.isspace():
+        return ""
+    
+    try:
+        tree = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=_HTML_PARSER)
+    except (etree.ParserError, ValueError):
+        return ""
+    
+    # str.split() both tokenizes and collapses whitespace, so no regex pass is
+    # needed over the joined text; stop once the budget is reached
+    words = []
+    length = 0
+    for node in _VISIBLE_TEXT_XPATH(tree):
+        for word in node.split():
+            words.append(word)
+            length += len(word) + 1
+        if length >= MAX_TEXT_CHARS:
+            break
+    
+    return ' '.join(words)[:MAX_TEXT_CHARS]
+
+
+def _parse_html_title(html: str) -> str:
+    """Extract the document <title>, with entities decoded as a browser would."""
+    head_end = _HEAD_END_RE.search(html)
+    match = _TITLE_RE.search(html, 0, head_end.start() if head_end else len(html))
+    return ' '.join(unescape(match.group(1)).split()) if match else ""
+
+
+def _parse_search_results(html: str, max_results: int) -> List[str]:
+    """Extract result URLs from a DuckDuckGo HTML results page."""
+    if not html.strip():
+        return []
+    
+    tree = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=_HTML_PARSER)
+    urls = []
+    
+    for href in _SEARCH_RESULT_XPATH(tree):
+        # Results may be wrapped as //duckduckgo.com/l/?uddg=<target>
+        if 'uddg=' in href:
+            href = parse_qs(urlsplit(href).query).get('uddg', [''])[0]
         
+        if href.startswith('http') and href not in urls:
+            urls.append(href)
+            if len(urls) >= max_results:
+                break
+    
+    return urls
+
+
+def _create_driver():
+    """Create a headless Chrome WebDriver."""
+    if not SELENIUM_AVAILABLE:
+        raise RuntimeError("Selenium is required. Install with: pip install selenium webdriver-manager")
+    
+    opts = Options()
+    opts.add_argument('--headless')
+    opts.add_argument('--no-sandbox')
+    opts.add_argument('--disable-dev-shm-usage')
+    opts.add_argument('--disable-blink-features=AutomationControlled')
+    opts.add_argument('--disable-gpu')
+    opts.add_argument('--window-size=1920,1080')
+    opts.add_argument(f'--user-agent={USER_AGENT}')
+    
+    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opts.add_experimental_option('useAutomationExtension', False)
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    
+    # Return from driver.get() at DOMContentLoaded instead of full load
+    opts.page_load_strategy = 'eager'
+    
+    try:
+        # keep_alive reuses the chromedriver HTTP connection across commands
+        if WEBDRIVER_MANAGER_AVAILABLE:
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=opts, keep_alive=True)
+        else:
+            driver = webdriver.Chrome(options=opts, keep_alive=True)
+        
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': '''
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                })
+            '''
+        })
+        
+        print("✅ WebDriver initialized successfully")
+        return driver
+        
+    except Exception as e:
+        raise RuntimeError(f"Failed to create WebDriver: {e}")
+
+
+class DriverPool:
+    """Bounded pool of headless Chrome drivers kept alive across crawls."""
+    
+    def __init__(self, size: int = DRIVER_POOL_SIZE):
+        """Create and pre-warm `size` drivers in parallel."""
+        self.size = size
+        self._drivers = queue.Queue(maxsize=size)
+        
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            futures = [executor.submit(_create_driver) for _ in range(size)]
+        
+        for future in futures:
+            try:
+                self._drivers.put(future.result())
+            except Exception as e:
+                # Keep the slot; acquire() retries creating the driver
+                print(f"⚠️  {e}")
+                self._drivers.put(None)
+    
+    def __len__(self):
+        return self.size
+    
+    @contextmanager
+    def acquire(self):
+        """Borrow a driver, blocking until one is free."""
+        driver = self._drivers.get()
+        try:
+            if driver is None:
+                driver = _create_driver()
+            yield driver
+        finally:
+            self.release(driver)
+    
+    def release(self, driver):
+        """Return a driver to the pool with its cookies cleared."""
+        if driver is not None:
+            try:
+                driver.delete_all_cookies()
+            except WebDriverException:
+                # Browser died; recreate it on next acquire
+                _quit_quietly(driver)
+                driver = None
+        self._drivers.put(driver)
+    
+    def close(self):
+        """Quit every idle driver."""
+        while True:
+            try:
+                driver = self._drivers.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                _quit_quietly(driver)
+
+
+class _HostThrottle:
+    """Per-host concurrency and rate limits for one crawl (event-loop local)."""
+    
+    def __init__(self, max_concurrent: int, interval: float):
+        self._slots: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_concurrent)
+        )
+        self._limiters: Dict[str, AsyncLimiter] = defaultdict(
+            lambda: AsyncLimiter(1, interval)
+        )
+    
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one of the URL host's concurrent request slots."""
+        async with self._slots[_extract_domain(url)]:
+            yield
+    
+    async def wait(self, url: str):
+        """Wait until the URL host's rate limit allows another request."""
+        await self._limiters[_extract_domain(url)].acquire()
+
+
+def _quit_quietly(driver):
+    """Quit a driver, ignoring errors from an already dead browser."""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+# Selenium is only used as a fallback for JS-rendered pages. The driver pool
+# is shared by every crawler in the process, created on first use and quit at
+# exit. Selenium calls run on a worker per pooled driver.
+_POOL: Optional[DriverPool] = None
+_POOL_LOCK = threading.Lock()
+_SELENIUM_EXECUTOR = ThreadPoolExecutor(max_workers=DRIVER_POOL_SIZE)
+
+
+def _get_pool() -> DriverPool:
+    """Return the shared driver pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = DriverPool()
+            atexit.register(_POOL.close)
+        return _POOL
+
+
+# HTML parsing is CPU-bound and holds the GIL, so pages are parsed in worker
+# processes while fetches continue on the event loop. Created on first use.
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+_PARSE_POOL_LOCK = threading.Lock()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Return the shared HTML parsing process pool, creating it on first use."""
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is None:
+            _PARSE_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+            atexit.register(_PARSE_POOL.shutdown, cancel_futures=True)
+        return _PARSE_POOL
+
+
+class WebCrawler:
+    """Advanced web crawler with source type filtering."""
+    
     def __enter__(self):
         """Context manager entry."""
-        self._init_driver()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         self.close()
     
-    def _init_driver(self):
-        """Initialize Chrome WebDriver."""
-        if self.driver:
-            return
-        
-        opts = Options()
-        opts.add_argument('--headless')
-        opts.add_argument('--no-sandbox')
-        opts.add_argument('--disable-dev-shm-usage')
-        opts.add_argument('--disable-blink-features=AutomationControlled')
-        opts.add_argument('--disable-gpu')
-        opts.add_argument('--window-size=1920,1080')
-        opts.add_argument(
-            '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        
-        opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-        opts.add_experimental_option('useAutomationExtension', False)
-        
-        try:
-            if WEBDRIVER_MANAGER_AVAILABLE:
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=opts)
-            else:
-                self.driver = webdriver.Chrome(options=opts)
-            
-            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                'source': '''
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    })
-                '''
-            })
-            
-            print("✅ WebDriver initialized successfully")
-            
-        except Exception as e:
-            raise RuntimeError(f"Failed to create WebDriver: {e}")
-    
     def close(self):
-        """Close the WebDriver."""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
+        """Release the crawler.
+        
+        The shared driver pool is kept alive for later crawls and quit at
+        interpreter exit.
+        """
+        pass
     
     def crawl_candidates(
         self,
@@ -132,140 +466,182 @@ class WebCrawler:
         Returns:
             Dict mapping candidate to {text, sources}
         """
-        if not self.driver:
-            self._init_driver()
-        
         context = context or {}
-        results = {}
         
-        for candidate in candidates:
-            print(f"\n🔍 Crawling: {candidate}")
-            
-            candidate_data = self._crawl_single_candidate(
-                candidate,
-                source_types,
-                context,
-                max_results_per_candidate
-            )
-            
-            results[candidate] = candidate_data
-            
-            # Rate limiting
-            time.sleep(RATE_LIMIT_DELAY)
+        # source_types is fixed for the whole crawl; unknown types are dropped here once
+        plans = []
+        for source_type in source_types:
+            config = CRAWL_SOURCES.get(source_type)
+            if config is not None:
+                plans.append(SourcePlan(source_type, config.suffix, config.domain_re, config.icon))
         
-        return results
+        return asyncio.run(self._crawl_all_async(
+            candidates,
+            plans,
+            context,
+            max_results_per_candidate
+        ))
     
-    def _crawl_single_candidate(
+    async def _crawl_all_async(
         self,
-        candidate: str,
-        source_types: List[str],
+        candidates: List[str],
+        plans: List[SourcePlan],
         context: Dict[str, str],
         max_results: int
-    ) -> Dict[str, any]:
-        """Crawl a single candidate across multiple source types."""
+    ) -> Dict[str, Dict[str, any]]:
+        """Search and fetch every (candidate, source type, URL) concurrently."""
         
-        all_texts = []
-        all_sources = []
+        # HTTP/2 multiplexes same-host requests over one TLS connection
+        limits = httpx.Limits(max_connections=32, max_keepalive_connections=16)
         
-        for source_type in source_types:
-            if source_type not in SOURCE_CONFIGS:
-                continue
-            
-            print(f"  📚 Source type: {source_type}")
+        async with httpx.AsyncClient(
+            http2=True,
+            limits=limits,
+            timeout=REQUEST_TIMEOUT,
+            headers=HTTP_HEADERS,
+            follow_redirects=True
+        ) as client:
+            # Search all (candidate, source type) pairs at once
+            jobs = [(candidate, plan) for candidate in candidates for plan in plans]
+            context_terms = self._build_context_terms(context)
+            # Hosts are rate limited independently, so unrelated hosts never wait on each other
+            throttle = _HostThrottle(PER_HOST_CONCURRENCY, RATE_LIMIT_DELAY)
             
-            # Build search query
-            query = self._build_query(candidate, source_type, context)
+            searches = await asyncio.gather(*[
+                self._search(client, self._build_query(candidate, plan, context_terms), max_results, throttle)
+                for candidate, plan in jobs
+            ])
             
-            # Perform search
-            urls = self._google_search(query, max_results=max_results)
+            # Map each unique URL to every (candidate, source type) that found it
+            url_targets: Dict[str, List[Tuple[str, SourcePlan]]] = {}
+            for (candidate, plan), urls in zip(jobs, searches):
+                filtered_urls = self._filter_urls_by_source(urls, plan)
+                print(f"  📚 {candidate} / {plan.source_type}: found {len(filtered_urls)} relevant URLs")
+                for url in filtered_urls[:max_results]:
+                    targets = url_targets.setdefault(url, [])
+                    # The same page is used once per candidate
+                    if all(c != candidate for c, _ in targets):
+                        targets.append((candidate, plan))
             
-            # Filter URLs by source type
-            filtered_urls = self._filter_urls_by_source(urls, source_type)
-            
-            print(f"    Found {len(filtered_urls)} relevant URLs")
+            # Fetch each unique page once, in one batch across all candidates
+            pages = await asyncio.gather(*[
+                self._extract_text(client, url, throttle) for url in url_targets
+            ])
+        
+        texts = {candidate: [] for candidate in candidates}
+        sources = {candidate: [] for candidate in candidates}
+        collected_at = datetime.now().isoformat()
+        
+        for (url, targets), (title, text) in zip(url_targets.items(), pages):
+            if not text:
+                continue
             
-            # Extract content from URLs
-            for url in filtered_urls[:max_results]:
-                text = self._extract_text(url)
-                
-                if text:
-                    all_texts.append(text)
-                    all_sources.append({
-                        "url": url,
-                        "title": self._extract_title(url),
-                        "source_type": source_type,
-                        "domain": self._extract_domain(url),
-                        "icon": SOURCE_CONFIGS[source_type].get("icon", "📄"),
-                        "collected_at": datetime.now().isoformat()
-                    })
-                
-                time.sleep(1)  # Rate limit between pages
+            domain = _extract_domain(url)
+            for candidate, plan in targets:
+                texts[candidate].append(text)
+                sources[candidate].append({
+                    "url": url,
+                    "title": title or domain,
+                    "source_type": plan.source_type,
+                    "domain": domain,
+                    "icon": plan.icon,
+                    "collected_at": collected_at
+                })
         
         return {
-            "text": "\n\n".join(all_texts),
-            "sources": all_sources
+            candidate: {
+                "text": "\n\n".join(texts[candidate]),
+                "sources": sources[candidate]
+            }
+            for candidate in candidates
         }
     
+    def _build_context_terms(self, context: Dict[str, str]) -> str:
+        """Build the candidate-independent part of every search query."""
+        
+        return ' '.join(
+            context[key] for key in ('entity_type', 'region') if context.get(key)
+        )
+    
     def _build_query(
         self,
         candidate: str,
-        source_type: str,
-        context: Dict[str, str]
+        plan: SourcePlan,
+        context_terms: str
     ) -> str:
         """Build search query with source type filtering."""
         
-        query_parts = [candidate]
-        
-        # Add context
-        if context.get('entity_type'):
-            query_parts.append(context['entity_type'])
+        return ' '.join(part for part in (candidate, context_terms, plan.suffix) if part)
+    
+    async def _search(
+        self,
+        client: httpx.AsyncClient,
+        query: str,
+        max_results: int,
+        throttle: _HostThrottle
+    ) -> List[str]:
+        """Search DuckDuckGo's HTML endpoint and extract result URLs."""
         
-        if context.get('region'):
-            query_parts.append(context['region'])
+        try:
+            search_url = SEARCH_URL.format(query=quote_plus(query))
+            await throttle.wait(search_url)
+            _, _, html, _ = await _fetch(client, search_url)
+            
+            loop = asyncio.get_running_loop()
+            urls = await loop.run_in_executor(None, _parse_search_results, html, max_results)
+            
+        except Exception as e:
+            print(f"    ⚠️  Search error: {e}")
+            urls = []
         
-        # Add source-specific suffix
-        config = SOURCE_CONFIGS.get(source_type, {})
-        if config.get('search_suffix'):
-            query_parts.append(config['search_suffix'])
+        # Search was blocked or returned nothing; render Google in Chrome instead
+        if not urls and SELENIUM_SEARCH_FALLBACK and SELENIUM_AVAILABLE:
+            await throttle.wait(GOOGLE_SEARCH_URL)
+            urls = await self._run_selenium(self._selenium_search, query, max_results)
         
-        return ' '.join(query_parts)
+        return urls
     
-    def _google_search(
+    def _selenium_search(
         self,
         query: str,
         max_results: int = 10
     ) -> List[str]:
-        """Perform Google search and extract URLs."""
+        """Perform Google search in Chrome and extract URLs."""
         
         urls = []
         
         try:
-            search_url = f"https://www.google.com/search?q={quote_plus(query)}"
-            self.driver.get(search_url)
-            
-            time.sleep(2)
-            
-            # Extract links
-            link_selectors = [
-                'div.g a[href]',
-                'div.yuRUbf a[href]',
-                'a[jsname="UWckNb"]',
-            ]
-            
-            for selector in link_selectors:
+            with _get_pool().acquire() as driver:
+                driver.get(GOOGLE_SEARCH_URL.format(query=quote_plus(query)))
+                
                 try:
-                    links = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for link in links:
-                        href = link.get_attribute('href')
-                        if href and href.startswith('http') and 'google.com' not in href:
-                            if href not in urls:
-                                urls.append(href)
-                                if len(urls) >= max_results:
-                                    return urls
-                except Exception:
-                    continue
-            
-            return urls
+                    WebDriverWait(driver, 5).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, 'div#search'))
+                    )
+                except TimeoutException:
+                    pass  # Consent or error page; the selectors below find nothing
+                
+                # Extract links
+                link_selectors = [
+                    'div.g a[href]',
+                    'div.yuRUbf a[href]',
+                    'a[jsname="UWckNb"]',
+                ]
+                
+                for selector in link_selectors:
+                    try:
+                        links = driver.find_elements(By.CSS_SELECTOR, selector)
+                        for link in links:
+                            href = link.get_attribute('href')
+                            if href and href.startswith('http') and 'google.com' not in href:
+                                if href not in urls:
+                                    urls.append(href)
+                                    if len(urls) >= max_results:
+                                        return urls
+                    except Exception:
+                        continue
+                
+                return urls
             
         except Exception as e:
             print(f"    ⚠️  Search error: {e}")
@@ -274,74 +650,93 @@ class WebCrawler:
     def _filter_urls_by_source(
         self,
         urls: List[str],
-        source_type: str
+        plan: SourcePlan
     ) -> List[str]:
         """Filter URLs to match source type domains."""
         
-        if source_type not in SOURCE_CONFIGS:
+        if plan.domain_re is None:
             return urls
         
-        config = SOURCE_CONFIGS[source_type]
-        allowed_domains = config.get('domains', [])
-        
-        if not allowed_domains:
-            return urls
-        
-        filtered = []
-        for url in urls:
-            domain = self._extract_domain(url)
-            
-            # Check if domain matches any allowed domain
-            for allowed in allowed_domains:
-                if allowed in domain or domain.endswith(allowed):
-                    filtered.append(url)
-                    break
-        
-        return filtered
+        return [url for url in urls if plan.domain_re.search(_extract_domain(url))]
     
-    def _extract_text(self, url: str, timeout: int = 10) -> str:
-        """Extract visible text from URL."""
+    async def _extract_text(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        throttle: _HostThrottle
+    ) -> Tuple[str, str]:
+        """Fetch a URL over HTTP and return its (title, visible text)."""
         
-        try:
-            self.driver.set_page_load_timeout(timeout)
-            self.driver.get(url)
+        async with throttle.slot(url):
+            # Revalidate cached pages instead of downloading them again
+            cached = http_cache.lookup(url)
+            response_headers = {}
             
-            WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((By.TAG_NAME, 'body'))
-            )
+            try:
+                await throttle.wait(url)
+                status, response_headers, html, truncated = await _fetch(
+                    client, url, http_cache.conditional_headers(cached), max_bytes=MAX_HTML_BYTES
+                )
             
-            time.sleep(2)
+                if status == 304 and cached:
+                    return http_cache.cached_page(cached)
             
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+                # Parse in another process so other fetches keep flowing
+                loop = asyncio.get_running_loop()
+                text = await loop.run_in_executor(_get_parse_pool(), _parse_html, html)
             
-            # Remove non-content tags
-            for tag in soup(['script', 'style', 'noscript', 'iframe', 'nav', 'footer', 'header', 'aside']):
-                tag.extract()
+                # The prefix held too little text (e.g. a bulky <head>); read the whole page
+                if len(text) < MIN_TEXT_CHARS and truncated:
+                    await throttle.wait(url)
+                    status, response_headers, html, _ = await _fetch(client, url)
+                    text = await loop.run_in_executor(_get_parse_pool(), _parse_html, html)
             
-            text = ' '.join(soup.stripped_strings)
-            text = re.sub(r'\s+', ' ', text).strip()
+                title = _parse_html_title(html)
             
-            # Limit text length
-            return text[:5000]
+            except Exception as e:
+                print(f"    ⚠️  Fetch error for {url}: {e}")
+                title, text = "", ""
             
-        except Exception as e:
-            print(f"    ⚠️  Extract error for {url}: {e}")
-            return ""
+            # Too little static text means the page is rendered client-side
+            if len(text) < MIN_TEXT_CHARS and SELENIUM_AVAILABLE:
+                await throttle.wait(url)
+                rendered_title, rendered_text = await self._run_selenium(self._selenium_extract_text, url)
+                if rendered_text:
+                    title, text = rendered_title, rendered_text
+            
+            if text:
+                http_cache.store(url, response_headers, title, text)
+            
+            return title, text
     
-    def _extract_title(self, url: str) -> str:
-        """Extract page title."""
-        try:
-            return self.driver.title or self._extract_domain(url)
-        except:
-            return self._extract_domain(url)
+    async def _run_selenium(self, func, *args):
+        """Run a blocking Selenium call on a driver pool worker."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_SELENIUM_EXECUTOR, func, *args)
     
-    def _extract_domain(self, url: str) -> str:
-        """Extract domain from URL."""
+    def _selenium_extract_text(self, url: str, timeout: int = 10) -> Tuple[str, str]:
+        """Render a URL in Chrome and return its (title, visible text)."""
+        
         try:
-            parsed = urlparse(url)
-            return parsed.netloc
-        except:
-            return "unknown.com"
+            with _get_pool().acquire() as driver:
+                driver.set_page_load_timeout(timeout)
+                driver.get(url)
+                
+                WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located((By.TAG_NAME, 'body'))
+                )
+                
+                # innerText is already limited to rendered text; collapse and trim it in
+                # the browser so only the budgeted text crosses the driver connection
+                text = driver.execute_script(_INNER_TEXT_SCRIPT, MAX_TEXT_CHARS) or ""
+                if not text:
+                    text = _parse_html(driver.page_source)
+                
+                return driver.title, text
+            
+        except Exception as e:
+            print(f"    ⚠️  Extract error for {url}: {e}")
+            return "", ""
 
 
 # Example usage
@@ -2,14 +2,19 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import asyncio
+import re
 import traceback
 import os
-from typing import Optional
-from io import StringIO, BytesIO
+from contextvars import ContextVar
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from io import BytesIO
 import pandas as pd
+import orjson
 from datetime import datetime
 
 # Import agents
@@ -19,33 +24,93 @@ from agents.scoring_agent import ScoringAgent
 
 # Import config
 from config.state import RankingState
-from config.settings import SOURCE_CONFIGS
+from config.settings import (
+    SOURCE_CONFIGS,
+    LLM_CACHE_DIR,
+    CACHE_DURATION,
+    REDIS_URL,
+    CHAT_TTL,
+    CHAT_LOCK_TIMEOUT,
+    LLM_REQUEST_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+    LLM_PRIORITY_CHARS_PER_SECOND,
+    LLM_REQUESTS_PER_MINUTE,
+    WORKER_COUNT,
+    INSIGHT_TABLE_ROWS
+)
 
 # Import utils
 from utils.helpers import (
     extract_urls, 
     parse_source_selection, 
     generate_chat_id,
-    format_time_ago
+    format_time_ago,
+    format_metric_display
 )
+from utils import insight_cache
+from utils.chat_store import ChatStore
+from utils.llm_cache import DiskLLMCache
+from utils.llm_scheduler import LLMScheduler
 
 # Initialize LLM
+import httpx
+from groq import AsyncGroq
 from langchain_groq import ChatGroq
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import HumanMessage, SystemMessage
+
+# On-disk completion cache, used only by models created with cache=True
+set_llm_cache(DiskLLMCache(LLM_CACHE_DIR, ttl=CACHE_DURATION))
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your-groq-api-key-here")
+
+# One pooled HTTP/2 client for every agent's Groq calls, so concurrent research
+# and scoring requests multiplex over warm connections instead of new handshakes
+groq_http = httpx.AsyncClient(
+    http2=True,
+    timeout=LLM_REQUEST_TIMEOUT,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+)
+groq_completions = AsyncGroq(api_key=GROQ_API_KEY, http_client=groq_http).chat.completions
+
+# Research, scoring and insight answers must stay fresh (refresh re-asks them),
+# so the shared model never reads the completion cache
 llm = ChatGroq(
     model="llama-3.3-70b-versatile",
     temperature=0.7,
-    groq_api_key=GROQ_API_KEY
+    groq_api_key=GROQ_API_KEY,
+    async_client=groq_completions,
+    cache=False
+)
+
+# Planning prompts (query analysis, metric choices) repeat byte for byte across
+# chats, so their answers are replayed from the on-disk cache
+planning_llm = ChatGroq(
+    model="llama-3.3-70b-versatile",
+    temperature=0.7,
+    groq_api_key=GROQ_API_KEY,
+    async_client=groq_completions,
+    cache=True
+)
+
+# Every chat's LLM calls share one set of slots, shortest prompts first
+# The limits are for the whole app, and each worker process has its own
+# scheduler, so every worker takes an equal share of them
+llm_scheduler = LLMScheduler(
+    llm,
+    max(1, LLM_MAX_CONCURRENCY // WORKER_COUNT),
+    LLM_PRIORITY_CHARS_PER_SECOND,
+    max(1, LLM_REQUESTS_PER_MINUTE // WORKER_COUNT)
 )
 
 # Initialize agents
-planning_agent = PlanningAgent(llm)
-research_agent = ResearchAgent(llm)
-scoring_agent = ScoringAgent(llm)
+planning_agent = PlanningAgent(llm_scheduler, cached_model=planning_llm)
+research_agent = ResearchAgent(llm_scheduler)
+scoring_agent = ScoringAgent(llm_scheduler)
 
 # FastAPI app
-app = FastAPI(title="Multi-Agent Ranking System")
+# orjson encodes the large messages/rows payloads several times faster than stdlib json
+app = FastAPI(title="Multi-Agent Ranking System", default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -54,6 +119,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown_resources():
+    """Close pooled Groq connections and the export workers."""
+    await groq_http.aclose()
+    if _export_pool is not None:
+        _export_pool.shutdown(cancel_futures=True)
+
 # Pydantic models
 class StartRequest(BaseModel):
     message: str
@@ -64,8 +136,30 @@ class ReplyRequest(BaseModel):
 class RefreshRequest(BaseModel):
     pass
 
-# In-memory chat storage
-chats = {}
+# Reply intents. A leading \b keeps inflections ("suggestions", "updated") while
+# rejecting matches inside other words ("book" is not "ok").
+_SUGGEST_RE = re.compile(r'\b(?:suggest|recommend|help|idea|option)', re.I)
+_ACCEPT_RE = re.compile(r'\b(?:accept|good|yes|ok(?:ay)?\b|perfect)', re.I)
+_REMOVE_RE = re.compile(r'\b(?:remove|without)', re.I)
+_AUTO_SOURCES_RE = re.compile(r'\b(?:auto|recommend|choose for me)', re.I)
+_CUSTOM_SOURCES_RE = re.compile(r'\b(?:custom|my own|provide)', re.I)
+_REFRESH_RE = re.compile(r'\b(?:refresh|update|reload|latest|current)', re.I)
+_CONFIRM_REFRESH_RE = re.compile(r'\b(?:yes|sure|ok(?:ay)?\b|yeah|refresh)', re.I)
+_NUMBER_RE = re.compile(r'\d+')
+_ROW_INDICES_RE = re.compile(r'(\d+(?:,\d+)*)')
+
+# Chat storage (Redis when REDIS_URL is set, so any worker can serve any chat).
+# Turns within a chat are serialized by its lock; different chats run concurrently.
+chat_store = ChatStore(REDIS_URL, ttl=CHAT_TTL, lock_timeout=CHAT_LOCK_TIMEOUT)
+
+# Set while a turn is served by the streaming endpoint; pipeline stages report into it
+pipeline_progress: ContextVar[Optional[asyncio.Queue]] = ContextVar("pipeline_progress", default=None)
+
+def report_progress(stage: str, **data) -> None:
+    """Publish a pipeline progress event to the streaming client, if there is one."""
+    queue = pipeline_progress.get()
+    if queue is not None:
+        queue.put_nowait({"stage": stage, **data})
 
 # Serve frontend (if available)
 try:
@@ -78,7 +172,7 @@ except Exception:
     pass
 
 @app.post("/start")
-def start_chat(req: StartRequest):
+async def start_chat(req: StartRequest):
     """Start a new ranking conversation."""
     try:
         # Initialize state
@@ -90,10 +184,10 @@ def start_chat(req: StartRequest):
         }
         
         # Planning Agent: Analyze query
-        state = planning_agent.analyze_query(state)
+        state = await planning_agent.analyze_query(state)
         
         chat_id = generate_chat_id()
-        chats[chat_id] = {
+        chat = {
             "id": chat_id,
             "query": req.message,
             "state": state,
@@ -113,7 +207,8 @@ def start_chat(req: StartRequest):
             "or say 'suggest metrics' and I'll provide options."
         )
         
-        chats[chat_id]["messages"].append({"role": "assistant", "text": prompt})
+        chat["messages"].append({"role": "assistant", "text": prompt})
+        await chat_store.set(chat_id, chat)
         
         title = f"{entity}"
         if region:
@@ -124,20 +219,77 @@ def start_chat(req: StartRequest):
             "chat_id": chat_id,
             "bot": prompt,
             "title": title,
-            "messages": chats[chat_id]["messages"]
+            "messages": chat["messages"]
         }
         
     except Exception as e:
         return {"ok": False, "error": str(e), "trace": traceback.format_exc()}
 
 @app.post("/chat/{chat_id}/reply")
-def chat_reply(chat_id: str, req: ReplyRequest):
+async def chat_reply(chat_id: str, req: ReplyRequest):
     """Handle replies in an existing chat."""
-    try:
-        if chat_id not in chats:
+    return await _locked_turn(chat_id, req)
+
+@app.post("/chat/{chat_id}/stream_pipeline")
+async def stream_pipeline(chat_id: str, req: ReplyRequest):
+    """Handle a reply like /reply, streaming ranking pipeline progress as NDJSON.
+    
+    Each line is a JSON event ({"stage": ...}); the last one has stage "done"
+    and carries the same payload /reply would have returned.
+    """
+    if await chat_store.get(chat_id) is None:
+        return {"ok": False, "error": "chat_id not found"}
+    
+    return StreamingResponse(_stream_reply(chat_id, req), media_type="application/x-ndjson")
+
+# Streamed turns still running; held so a client disconnect cannot drop them
+_running_turns: set = set()
+
+async def _locked_turn(chat_id: str, req: ReplyRequest) -> dict:
+    """Load a chat, run one reply turn and save it, all under the chat's lock."""
+    async with chat_store.lock(chat_id):
+        chat = await chat_store.get(chat_id)
+        if chat is None:
             return {"ok": False, "error": "chat_id not found"}
         
-        chat = chats[chat_id]
+        result = await _chat_reply(chat, req)
+        await chat_store.set(chat_id, chat)
+        return result
+
+async def _stream_reply(chat_id: str, req: ReplyRequest):
+    """Run a reply turn and yield its progress events, then its result."""
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    # The whole locked turn runs as its own task, so a disconnected client only
+    # stops this generator; the turn keeps the lock until it has saved the chat.
+    # The task copies the current context, so the turn reports into this queue.
+    token = pipeline_progress.set(queue)
+    try:
+        turn = asyncio.create_task(_locked_turn(chat_id, req))
+    finally:
+        pipeline_progress.reset(token)
+    _running_turns.add(turn)
+    turn.add_done_callback(_running_turns.discard)
+    turn.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    while (event := await queue.get()) is not None:
+        yield _ndjson(event)
+    
+    # Headers are already sent, so store or lock failures still end the
+    # stream with a "done" event rather than cutting it short
+    try:
+        result = turn.result()
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    yield _ndjson({"stage": "done", **result})
+
+def _ndjson(event: dict) -> bytes:
+    """Encode one streaming event as a JSON line."""
+    return orjson.dumps(event, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+async def _chat_reply(chat: dict, req: ReplyRequest) -> dict:
+    """Dispatch a reply to the handler for the chat's current stage."""
+    try:
         chat["messages"].append({"role": "user", "text": req.message})
         
         state = chat["state"]
@@ -145,51 +297,65 @@ def chat_reply(chat_id: str, req: ReplyRequest):
         
         # Stage 1: Awaiting metric input
         if current_stage == "awaiting_metric_input":
-            return handle_metric_input(chat, req.message)
+            return await handle_metric_input(chat, req.message)
         
         # Stage 2: Awaiting metric selection (after suggestions)
         elif current_stage == "awaiting_metric_selection":
-            return handle_metric_selection(chat, req.message)
+            return await handle_metric_selection(chat, req.message)
         
         # Stage 3: Awaiting source selection
         elif current_stage == "awaiting_sources":
-            return handle_source_selection(chat, req.message)
+            return await handle_source_selection(chat, req.message)
         
         # Stage 4: Awaiting custom URLs
         elif current_stage == "awaiting_custom_urls":
-            return handle_custom_urls(chat, req.message)
+            return await handle_custom_urls(chat, req.message)
         
         # Stage 5: Completed - handle insights
         elif current_stage == "completed":
-            return handle_insight_query(chat, req.message)
+            return await handle_insight_query(chat, req.message)
         
         # Stage 6: Awaiting refresh confirmation
         elif current_stage == "awaiting_refresh":
-            return handle_refresh_confirmation(chat, req.message)
+            return await handle_refresh_confirmation(chat, req.message)
         
         return {"ok": False, "error": f"Unknown stage: {current_stage}"}
         
     except Exception as e:
         return {"ok": False, "error": str(e), "trace": traceback.format_exc()}
 
-def handle_metric_input(chat: dict, message: str) -> dict:
+def metrics_display(chat: dict) -> Tuple[Dict[str, str], str]:
+    """Display names for the chat's metrics and their joined description.
+    
+    Stored on the chat and rebuilt only when the metrics change, so every turn
+    (and every prompt) reuses the same strings.
+    """
+    metrics = chat["state"].get("metrics", [])
+    display = chat.get("metrics_display")
+    if display is None or list(display) != metrics:
+        display = {m: format_metric_display(m) for m in metrics}
+        chat["metrics_display"] = display
+        chat["metrics_descr"] = ", ".join(display.values())
+    return display, chat["metrics_descr"]
+
+async def handle_metric_input(chat: dict, message: str) -> dict:
     """Handle initial metric input from user."""
     state = chat["state"]
     
-    if any(word in message.lower() for word in ['suggest', 'recommend', 'help', 'ideas', 'options']):
+    if _SUGGEST_RE.search(message):
         # User wants suggestions - Planning Agent selects metrics
-        state = planning_agent.select_metrics(state)
+        state = await planning_agent.select_metrics(state)
         chat["state"] = state
         chat["stage"] = "awaiting_metric_selection"
         
         metrics = state.get("metrics", [])
         weights = state.get("weights", {})
+        display, _ = metrics_display(chat)
         
         metric_list = []
         for i, metric in enumerate(metrics, 1):
             weight = weights.get(metric, 0)
-            metric_display = metric.replace('_', ' ').title()
-            metric_list.append(f"{i}. **{metric_display}** (weight: {weight:.2f})")
+            metric_list.append(f"{i}. **{display[metric]}** (weight: {weight:.2f})")
         
         suggestion_text = (
             f"Here are my suggested metrics for ranking {state.get('entity_type')}:\n\n" +
@@ -206,42 +372,43 @@ def handle_metric_input(chat: dict, message: str) -> dict:
             "ok": True,
             "bot_text": suggestion_text,
             "suggested_metrics": [
-                {"name": m, "weight": weights.get(m, 0), "display": m.replace('_', ' ').title()}
+                {"name": m, "weight": weights.get(m, 0), "display": display[m]}
                 for m in metrics
             ],
             "messages": chat["messages"]
         }
     else:
         # User specified custom metrics
-        custom_metrics, custom_weights = planning_agent.parse_custom_metrics(message)
+        custom_metrics, custom_weights = await planning_agent.parse_custom_metrics(message)
         
         if custom_metrics:
             state["metrics"] = custom_metrics
             state["weights"] = custom_weights
             chat["state"] = state
             
-            return proceed_to_source_selection(chat)
+            return await proceed_to_source_selection(chat)
         else:
             clarify = "I didn't quite catch which metrics you'd like. Could you list them or ask me to suggest some?"
             chat["messages"].append({"role": "assistant", "text": clarify})
             return {"ok": True, "bot_text": clarify, "messages": chat["messages"]}
 
-def handle_metric_selection(chat: dict, message: str) -> dict:
+async def handle_metric_selection(chat: dict, message: str) -> dict:
     """Handle metric selection/modification after suggestions."""
     state = chat["state"]
-    message_lower = message.lower()
     
     # User accepts suggested metrics
-    if any(word in message_lower for word in ['accept', 'good', 'yes', 'okay', 'ok', 'perfect']):
-        return proceed_to_source_selection(chat)
+    if _ACCEPT_RE.search(message):
+        return await proceed_to_source_selection(chat)
     
     # User wants to remove metrics
-    elif 'remove' in message_lower or 'without' in message_lower:
+    elif _REMOVE_RE.search(message):
         current_metrics = state.get("metrics", [])
+        message_lower = message.lower()
+        numbers = set(_NUMBER_RE.findall(message))
         remove_indices = []
         
         for i in range(len(current_metrics)):
-            if str(i+1) in message or current_metrics[i] in message_lower:
+            if str(i+1) in numbers or current_metrics[i] in message_lower:
                 remove_indices.append(i)
         
         new_metrics = [m for i, m in enumerate(current_metrics) if i not in remove_indices]
@@ -254,7 +421,7 @@ def handle_metric_selection(chat: dict, message: str) -> dict:
             state["weights"] = new_weights
             chat["state"] = state
             
-            metrics_descr = ", ".join([m.replace('_', ' ').title() for m in new_metrics])
+            display, metrics_descr = metrics_display(chat)
             confirmation = f"Updated! I'll use: **{metrics_descr}**. Does this look good?"
             
             chat["messages"].append({"role": "assistant", "text": confirmation})
@@ -263,7 +430,7 @@ def handle_metric_selection(chat: dict, message: str) -> dict:
                 "ok": True,
                 "bot_text": confirmation,
                 "suggested_metrics": [
-                    {"name": m, "weight": new_weights.get(m, 0), "display": m.replace('_', ' ').title()}
+                    {"name": m, "weight": new_weights.get(m, 0), "display": display[m]}
                     for m in new_metrics
                 ],
                 "messages": chat["messages"]
@@ -275,25 +442,25 @@ def handle_metric_selection(chat: dict, message: str) -> dict:
     
     # User provides custom metrics
     else:
-        custom_metrics, custom_weights = planning_agent.parse_custom_metrics(message)
+        custom_metrics, custom_weights = await planning_agent.parse_custom_metrics(message)
         
         if custom_metrics:
             state["metrics"] = custom_metrics
             state["weights"] = custom_weights
             chat["state"] = state
             
-            return proceed_to_source_selection(chat)
+            return await proceed_to_source_selection(chat)
         else:
             clarify = "I didn't understand. Accept current metrics or specify your own."
             chat["messages"].append({"role": "assistant", "text": clarify})
             return {"ok": True, "bot_text": clarify, "messages": chat["messages"]}
 
-def proceed_to_source_selection(chat: dict) -> dict:
+async def proceed_to_source_selection(chat: dict) -> dict:
     """Move to source selection stage."""
     state = chat["state"]
     chat["stage"] = "awaiting_sources"
     
-    metrics_descr = ", ".join([m.replace('_', ' ').title() for m in state.get("metrics", [])])
+    _, metrics_descr = metrics_display(chat)
     
     # Get source recommendations from Planning Agent
     source_info = planning_agent.recommend_sources(state)
@@ -314,24 +481,23 @@ def proceed_to_source_selection(chat: dict) -> dict:
         "messages": chat["messages"]
     }
 
-def handle_source_selection(chat: dict, message: str) -> dict:
+async def handle_source_selection(chat: dict, message: str) -> dict:
     """Handle source selection from user."""
     state = chat["state"]
-    message_lower = message.lower()
     
     # Check if user selected "auto"
-    if 'auto' in message_lower or 'recommend' in message_lower or 'choose for me' in message_lower:
+    if _AUTO_SOURCES_RE.search(message):
         state['source_types'] = ['auto']
         state['explicit_source_urls'] = None
-        return run_ranking_pipeline(chat)
+        return await run_ranking_pipeline(chat)
     
     # Check if user wants custom URLs
-    elif 'custom' in message_lower or 'my own' in message_lower or 'provide' in message_lower:
+    elif _CUSTOM_SOURCES_RE.search(message):
         urls = extract_urls(message)
         if urls:
             state['explicit_source_urls'] = urls
             state['source_types'] = ['custom']
-            return run_ranking_pipeline(chat)
+            return await run_ranking_pipeline(chat)
         else:
             chat["stage"] = "awaiting_custom_urls"
             ask_urls = "Please paste the URLs you'd like me to use (one per line or comma-separated)."
@@ -346,45 +512,59 @@ def handle_source_selection(chat: dict, message: str) -> dict:
         if selected_sources:
             state['source_types'] = selected_sources
             state['explicit_source_urls'] = None
-            return run_ranking_pipeline(chat)
+            return await run_ranking_pipeline(chat)
         else:
             # Try to extract URLs anyway
             urls = extract_urls(message)
             if urls:
                 state['explicit_source_urls'] = urls
                 state['source_types'] = ['custom']
-                return run_ranking_pipeline(chat)
+                return await run_ranking_pipeline(chat)
             else:
                 clarify = "I didn't quite catch which sources. You can say 'auto', select specific types, or provide URLs."
                 chat["messages"].append({"role": "assistant", "text": clarify})
                 return {"ok": True, "bot_text": clarify, "messages": chat["messages"]}
 
-def handle_custom_urls(chat: dict, message: str) -> dict:
+async def handle_custom_urls(chat: dict, message: str) -> dict:
     """Handle custom URL input."""
     urls = extract_urls(message)
     
     if urls:
         chat["state"]['explicit_source_urls'] = urls
         chat["state"]['source_types'] = ['custom']
-        return run_ranking_pipeline(chat)
+        return await run_ranking_pipeline(chat)
     else:
         error_msg = "I didn't find any URLs. Please paste them (e.g., https://example.com)"
         chat["messages"].append({"role": "assistant", "text": error_msg})
         return {"ok": True, "bot_text": error_msg, "messages": chat["messages"]}
 
-def run_ranking_pipeline(chat: dict) -> dict:
-    """Execute the full ranking pipeline with all agents."""
+async def run_ranking_pipeline(chat: dict, refresh: bool = False) -> dict:
+    """Execute the full ranking pipeline with all agents.
+    
+    refresh=True re-asks for research and scores instead of reusing cached ones.
+    """
     state = chat["state"]
     chat["stage"] = "running_pipeline"
     
     # Research Agent: Generate candidates
-    state = research_agent.generate_candidates(state)
+    state = await research_agent.generate_candidates(state)
+    report_progress("candidates", items=state.get("candidates", []))
     
-    # Research Agent: Collect data from sources
-    state = research_agent.collect_data(state)
+    # Auto sources need no citations: plan and score in a single LLM call
+    state["scores"] = None
+    if state.get("source_types") == ['auto'] and not state.get("explicit_source_urls"):
+        state = await planning_agent.plan_and_score(state)
+    
+    # Fall back to the decomposed research + scoring steps
+    if state.get("scores") is None:
+        # Research Agent: Collect data from sources
+        state = await research_agent.collect_data(state, refresh=refresh)
+        report_progress("research", candidates=len(state.get("raw_data") or {}))
+        
+        # Scoring Agent: Score candidates
+        state = await scoring_agent.score_candidates(state, refresh=refresh)
     
-    # Scoring Agent: Score candidates
-    state = scoring_agent.score_candidates(state)
+    report_progress("scores", metrics=state.get("metrics", []))
     
     # Scoring Agent: Generate ranking
     state = scoring_agent.generate_ranking(state)
@@ -396,9 +576,14 @@ def run_ranking_pipeline(chat: dict) -> dict:
     chat["state"] = state
     chat["stage"] = "completed"
     
+    # Every insight turn on this ranking reuses the same prompt prefix
+    chat["insight_prefix_messages"] = (
+        build_insight_prefix(state) if state.get("final_table") is not None else None
+    )
+    
     # Build response
     table = state.get("final_table")
-    metrics_descr = ", ".join([m.replace('_', ' ').title() for m in state.get("metrics", [])])
+    _, metrics_descr = metrics_display(chat)
     num_items = state.get("num_items", 10)
     total_available = state.get("total_available", num_items)
     
@@ -410,8 +595,11 @@ def run_ranking_pipeline(chat: dict) -> dict:
         source_names = [SOURCE_CONFIGS[st]["name"] for st in source_types if st in SOURCE_CONFIGS]
         bot_text += f"\n\n📚 **Sources used:** {', '.join(source_names)}"
     
+    # One clock reading for every timestamp in this response
+    now = datetime.now()
+    
     # Add change information if detected
-    change_summary = scoring_agent.generate_change_summary(state)
+    change_summary = scoring_agent.generate_change_summary(state, now)
     if change_summary:
         bot_text += f"\n\n{change_summary}"
     
@@ -421,7 +609,7 @@ def run_ranking_pipeline(chat: dict) -> dict:
     
     # Add freshness indicator
     if state.get("last_updated"):
-        bot_text += f"\n\n🕒 Data freshness: {format_time_ago(state['last_updated'])}"
+        bot_text += f"\n\n🕒 Data freshness: {format_time_ago(state['last_updated'], now)}"
     
     chat["messages"].append({"role": "assistant", "text": bot_text})
     
@@ -436,10 +624,11 @@ def run_ranking_pipeline(chat: dict) -> dict:
         
         # Prepare source information for transparency
         source_map = state.get("source_map", {})
+        ranked_names = set(table['Name'])
         sources_info = {
             candidate: sources
             for candidate, sources in source_map.items()
-            if candidate in [row['Name'] for row in rows]
+            if candidate in ranked_names
         }
     
     return {
@@ -450,16 +639,16 @@ def run_ranking_pipeline(chat: dict) -> dict:
         "sources": sources_info,
         "num_items": num_items,
         "total_available": total_available,
-        "last_updated": state.get("last_updated").isoformat() if state.get("last_updated") else None,
+        "last_updated": state.get("last_updated"),
         "messages": chat["messages"]
     }
 
-def handle_insight_query(chat: dict, message: str) -> dict:
+async def handle_insight_query(chat: dict, message: str) -> dict:
     """Handle insight queries about completed rankings."""
     state = chat["state"]
     
     # Check if user wants to refresh data
-    if any(word in message.lower() for word in ['refresh', 'update', 'reload', 'latest', 'current']):
+    if _REFRESH_RE.search(message):
         chat["stage"] = "awaiting_refresh"
         confirm_msg = (
             "🔄 Would you like me to refresh the ranking with the latest data? "
@@ -470,7 +659,7 @@ def handle_insight_query(chat: dict, message: str) -> dict:
         return {"ok": True, "bot_text": confirm_msg, "messages": chat["messages"]}
     
     # Generate insight using LLM
-    bot_text, cols, rows = generate_humanized_insight(state, message)
+    bot_text, cols, rows = await generate_humanized_insight(state, message, chat)
     chat["messages"].append({"role": "assistant", "text": bot_text})
     
     return {
@@ -481,49 +670,73 @@ def handle_insight_query(chat: dict, message: str) -> dict:
         "messages": chat["messages"]
     }
 
-def handle_refresh_confirmation(chat: dict, message: str) -> dict:
+async def handle_refresh_confirmation(chat: dict, message: str) -> dict:
     """Handle confirmation for data refresh."""
-    if any(word in message.lower() for word in ['yes', 'sure', 'ok', 'yeah', 'refresh']):
+    if _CONFIRM_REFRESH_RE.search(message):
         # Save previous scores for change detection
         chat["state"]["previous_scores"] = chat["state"].get("scores", {})
         
         # Re-run the pipeline
-        return run_ranking_pipeline(chat)
+        return await run_ranking_pipeline(chat, refresh=True)
     else:
         chat["stage"] = "completed"
         bot_text = "Okay, continuing with current data. What would you like to know?"
         chat["messages"].append({"role": "assistant", "text": bot_text})
         return {"ok": True, "bot_text": bot_text, "messages": chat["messages"]}
 
-def generate_humanized_insight(state: dict, user_question: str) -> tuple:
+# Insight prompts are laid out as [instructions][ranking table][question]: the first
+# two messages are byte-identical across a chat's turns, so provider-side prompt
+# caching can reuse their prefill and only the question is new each turn.
+INSIGHT_INSTRUCTIONS = """You are a friendly data analyst. Answer the user's question about the ranking that follows.
+
+Provide a conversational, insightful answer with specific data points.
+If showing table data, indicate "SHOW_TABLE: true" and row indices (comma-separated).
+Otherwise, indicate "SHOW_TABLE: false"
+"""
+
+def build_insight_prefix(state: dict) -> list:
+    """Build the instruction and ranking-table messages that open every insight prompt."""
+    df = state.get("final_table")
+    metrics = state.get("metrics", [])
+    entity_type = state.get("entity_type", "items")
+    
+    # CSV carries the same table without to_string's column padding, which
+    # only costs prompt tokens; long tables are cut to the top rows plus means
+    table = df.head(INSIGHT_TABLE_ROWS).to_csv(index=False)
+    remaining = len(df) - INSIGHT_TABLE_ROWS
+    if remaining > 0:
+        metric_means = df[[m for m in metrics if m in df.columns]].mean().round(2).to_dict()
+        table += f"... {remaining} more rows, metric means: {metric_means}\n"
+    
+    ranking_context = (
+        f"Entity Type: {entity_type}\n"
+        f"Metrics: {', '.join(metrics)}\n\n"
+        f"Ranking Table (CSV):\n{table}"
+    )
+    
+    return [SystemMessage(content=INSIGHT_INSTRUCTIONS), SystemMessage(content=ranking_context)]
+
+async def generate_humanized_insight(state: dict, user_question: str, chat: Optional[dict] = None) -> tuple:
     """Generate conversational insights about the ranking."""
     df = state.get("final_table")
     if df is None:
         return ("I don't have a ranking table yet to analyze.", None, None)
     
-    table_context = df.to_string(index=False)
-    metrics = state.get("metrics", [])
-    entity_type = state.get("entity_type", "items")
+    # Paraphrases of an earlier question about the same table reuse its answer
+    if chat:
+        table_hash = insight_cache.ranking_hash(df)
+        question_embedding = await asyncio.to_thread(insight_cache.embed, user_question)
+        cached = insight_cache.lookup(chat, table_hash, user_question, question_embedding)
+        if cached is not None:
+            return cached
     
-    prompt = f"""You are a friendly data analyst. Answer the user's question about this ranking.
-
-Entity Type: {entity_type}
-Metrics: {', '.join(metrics)}
-
-Ranking Table:
-{table_context}
-
-User Question: "{user_question}"
-
-Provide a conversational, insightful answer with specific data points.
-If showing table data, indicate "SHOW_TABLE: true" and row indices (comma-separated).
-Otherwise, indicate "SHOW_TABLE: false"
-"""
+    prefix_messages = chat.get("insight_prefix_messages") if chat else None
+    if prefix_messages is None:
+        prefix_messages = build_insight_prefix(state)
     
     try:
-        from langchain_core.messages import HumanMessage
-        messages = [HumanMessage(content=prompt)]
-        response = llm.invoke(messages)
+        messages = [*prefix_messages, HumanMessage(content=f'User Question: "{user_question}"')]
+        response = await llm_scheduler.ainvoke(messages)
         content = response.content.strip()
         
         show_table = False
@@ -537,114 +750,146 @@ Otherwise, indicate "SHOW_TABLE: false"
             
             if "true" in table_instruction.lower():
                 show_table = True
-                import re
-                indices_match = re.search(r'(\d+(?:,\d+)*)', table_instruction)
+                indices_match = _ROW_INDICES_RE.search(table_instruction)
                 if indices_match:
                     row_indices = [int(i) for i in indices_match.group(1).split(',')]
         
         if show_table and row_indices:
-            filtered_df = df[df['Rank'].isin([i+1 for i in row_indices])]
-            return (insight_text, list(filtered_df.columns), filtered_df.to_dict(orient='records'))
+            filtered_df = df[df['Rank'].isin({i + 1 for i in row_indices})]
+            answer = (insight_text, list(filtered_df.columns), filtered_df.to_dict(orient='records'))
         elif show_table:
-            return (insight_text, list(df.columns), df.to_dict(orient='records'))
+            answer = (insight_text, list(df.columns), df.to_dict(orient='records'))
         else:
-            return (insight_text, None, None)
+            answer = (insight_text, None, None)
+        
+        if chat:
+            insight_cache.store(chat, table_hash, user_question, question_embedding, answer)
+        return answer
             
     except Exception as e:
         print(f"Error generating insight: {e}")
         return (f"Looking at the data, there are interesting patterns. Could you rephrase your question?", None, None)
 
 @app.get("/chat/{chat_id}/messages")
-def get_messages(chat_id: str):
+async def get_messages(chat_id: str):
     """Get all messages for a chat."""
-    if chat_id not in chats:
+    chat = await chat_store.get(chat_id)
+    if chat is None:
         return {"ok": False, "error": "chat_id not found"}
     
     return {
         "ok": True,
-        "messages": chats[chat_id]["messages"]
+        "messages": chat["messages"]
     }
 
 @app.get("/chat/{chat_id}/sources")
-def get_sources(chat_id: str):
+async def get_sources(chat_id: str):
     """Get detailed source information for a ranking."""
-    if chat_id not in chats:
+    chat = await chat_store.get(chat_id)
+    if chat is None:
         return {"ok": False, "error": "chat_id not found"}
     
-    source_map = chats[chat_id]["state"].get("source_map", {})
+    source_map = chat["state"].get("source_map", {})
     
     return {
         "ok": True,
         "sources": source_map,
-        "last_updated": chats[chat_id]["state"].get("last_updated")
+        "last_updated": chat["state"].get("last_updated")
     }
 
 @app.post("/chat/{chat_id}/refresh")
-def refresh_ranking(chat_id: str):
+async def refresh_ranking(chat_id: str):
     """Manually refresh the ranking with latest data."""
-    if chat_id not in chats:
-        return {"ok": False, "error": "chat_id not found"}
-    
-    chat = chats[chat_id]
-    
-    if chat.get("stage") != "completed":
-        return {"ok": False, "error": "Ranking not yet completed"}
-    
-    # Save previous scores
-    chat["state"]["previous_scores"] = chat["state"].get("scores", {})
-    
-    # Re-run pipeline
-    result = run_ranking_pipeline(chat)
-    
-    return result
+    async with chat_store.lock(chat_id):
+        chat = await chat_store.get(chat_id)
+        if chat is None:
+            return {"ok": False, "error": "chat_id not found"}
+        
+        if chat.get("stage") != "completed":
+            return {"ok": False, "error": "Ranking not yet completed"}
+        
+        # Save previous scores
+        chat["state"]["previous_scores"] = chat["state"].get("scores", {})
+        
+        # Re-run pipeline
+        result = await run_ranking_pipeline(chat, refresh=True)
+        await chat_store.set(chat_id, chat)
+        
+        return result
+
+# Rows encoded per CSV chunk when streaming downloads
+CSV_CHUNK_ROWS = 1000
+
+# xlsxwriter encoding is pure Python and holds the GIL, so workbooks are built
+# in worker processes where they cannot stall the event loop. Created on first use.
+_export_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_export_pool() -> ProcessPoolExecutor:
+    """Return the process pool used for XLSX exports, creating it on first use."""
+    global _export_pool
+    if _export_pool is None:
+        _export_pool = ProcessPoolExecutor(max_workers=2)
+    return _export_pool
 
 @app.get("/chat/{chat_id}/download")
-def download_table(chat_id: str, format: str = "csv"):
+async def download_table(chat_id: str, format: str = "csv"):
     """Download the ranking table."""
-    if chat_id not in chats:
+    chat = await chat_store.get(chat_id)
+    if chat is None:
         return {"ok": False, "error": "chat_id not found"}
     
-    df = chats[chat_id]["state"].get("full_table")
+    df = chat["state"].get("full_table")
     if df is None:
-        df = chats[chat_id]["state"].get("final_table")
+        df = chat["state"].get("final_table")
     
     if df is None:
         return {"ok": False, "error": "No table available"}
     
-    if "Rank" not in df.columns:
-        df_copy = df.copy()
-        df_copy.index = df_copy.index + 1
-        df_copy.insert(0, "Rank", df_copy.index)
-    else:
-        df_copy = df.copy()
-    
+    # generate_ranking stores the table already ranked, and encoding only reads
+    # it, so it is streamed as is: no sort, copy or Rank insertion per download
     filename = f"ranking_{chat_id[:8]}"
     
     if format == "csv":
-        buffer = StringIO()
-        df_copy.to_csv(buffer, index=False)
-        buffer.seek(0)
-        
         return StreamingResponse(
-            buffer,
+            _csv_chunks(df),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
         )
     
     elif format == "xlsx":
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-            df_copy.to_excel(writer, index=False, sheet_name="Ranking")
-        buffer.seek(0)
+        loop = asyncio.get_running_loop()
+        workbook = await loop.run_in_executor(_get_export_pool(), _xlsx_bytes, df)
         
-        return StreamingResponse(
-            buffer,
+        # The workbook only exists once complete, so send it as one body
+        return Response(
+            workbook,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={filename}.xlsx"}
         )
     
     return {"ok": False, "error": "Invalid format (use csv or xlsx)"}
 
+async def _csv_chunks(df: pd.DataFrame):
+    """Yield a table as CSV, CSV_CHUNK_ROWS rows at a time, header first."""
+    for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+        # Each chunk is formatted on a worker thread to keep the event loop free
+        yield await asyncio.to_thread(_csv_chunk, df, start)
+
+def _csv_chunk(df: pd.DataFrame, start: int) -> str:
+    """Format CSV_CHUNK_ROWS rows from `start`, with the header on the first chunk."""
+    return df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(
+        index=False,
+        header=start == 0,
+        lineterminator="\n"
+    )
+
+def _xlsx_bytes(df: pd.DataFrame) -> bytes:
+    """Encode a table as an XLSX workbook (runs in the export process pool)."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="Ranking")
+    return buffer.getvalue()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""Chat session storage shared by every uvicorn worker."""
+
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import pickle
+import weakref
+from contextlib import asynccontextmanager
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import LockNotOwnedError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+class ChatStore:
+    """Chats keyed by chat_id, kept in Redis when configured, else in process memory.
+    
+    Redis lets follow-up requests for a chat land on any worker, so uvicorn can
+    run with several workers. Chats are pickled whole (including the ranking
+    DataFrames) and expire after `ttl` seconds without a write. Without Redis
+    the store is a plain dict and the app must run as a single worker.
+    """
+    
+    def __init__(self, redis_url: Optional[str], ttl: int, lock_timeout: int):
+        self._ttl = ttl
+        self._lock_timeout = lock_timeout
+        self._redis = None
+        self._memory: Dict[str, dict] = {}
+        # Locks drop out once no turn holds or waits for them, so requests for
+        # unknown chat ids do not accumulate locks
+        self._memory_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        if redis_url and REDIS_AVAILABLE:
+            self._redis = aioredis.from_url(redis_url)
+        elif redis_url:
+            print("⚠️  redis not available, keeping chats in memory. Install with: pip install redis")
+    
+    def _key(self, chat_id: str) -> str:
+        """Redis key holding a chat."""
+        return f"chat:{chat_id}"
+    
+    async def get(self, chat_id: str) -> Optional[dict]:
+        """Load a chat, or None if it does not exist (or has expired)."""
+        if self._redis is None:
+            return self._memory.get(chat_id)
+        
+        data = await self._redis.get(self._key(chat_id))
+        return pickle.loads(data) if data is not None else None
+    
+    async def set(self, chat_id: str, chat: dict) -> None:
+        """Save a chat; with Redis this must follow every change to a loaded chat."""
+        if self._redis is None:
+            self._memory[chat_id] = chat
+            return
+        
+        await self._redis.set(
+            self._key(chat_id),
+            pickle.dumps(chat, protocol=pickle.HIGHEST_PROTOCOL),
+            ex=self._ttl
+        )
+    
+    @asynccontextmanager
+    async def lock(self, chat_id: str) -> AsyncIterator[None]:
+        """Serialize turns within a chat, across workers when Redis is used."""
+        if self._redis is None:
+            lock = self._memory_locks.get(chat_id)
+            if lock is None:
+                lock = self._memory_locks[chat_id] = asyncio.Lock()
+            async with lock:
+                yield
+            return
+        
+        # SET NX based lock; the timeout frees it if a worker dies mid-turn, and
+        # waiting for a busy chat gives up after the same time
+        lock = self._redis.lock(
+            f"{self._key(chat_id)}:lock",
+            timeout=self._lock_timeout,
+            blocking_timeout=self._lock_timeout
+        )
+        if not await lock.acquire():
+            raise TimeoutError(f"Chat {chat_id} is busy with another turn")
+        
+        # Long pipelines must not outlive the lock, so it is renewed while held
+        keep_alive = asyncio.create_task(self._keep_alive(lock))
+        try:
+            yield
+        finally:
+            keep_alive.cancel()
+            try:
+                await lock.release()
+            except LockNotOwnedError:
+                print(f"⚠️  Lock for chat {chat_id} expired before its turn finished")
+    
+    async def _keep_alive(self, lock) -> None:
+        """Reset a held Redis lock's timeout until cancelled."""
+        while True:
+            await asyncio.sleep(self._lock_timeout / 3)
+            try:
+                await lock.reacquire()
+            except LockNotOwnedError:
+                return
@@ -1,42 +1,61 @@
 """Utility functions for the ranking system."""
 
 import re
-from typing import List, Optional
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Pattern, Tuple
+from datetime import datetime
+
+_URL_RE = re.compile(r'https?://\S+')
+_ALL_SOURCES_RE = re.compile(r'\b(?:all|every(?:thing)?)\b', re.I)
+
+# Drops characters that are invalid in file names and turns spaces into underscores
+_FILENAME_TRANSLATION = str.maketrans({**dict.fromkeys('<>:"/\\|?*'), ' ': '_'})
+
+@lru_cache(maxsize=32)
+def _source_patterns(available_sources: Tuple[str, ...]) -> Tuple[Tuple[str, Pattern[str]], ...]:
+    """Compile one matcher per source for its id ("social_media") or name ("social media")."""
+    return tuple(
+        (
+            source,
+            re.compile(rf"\b(?:{re.escape(source)}|{re.escape(source.replace('_', ' '))})\b", re.I)
+        )
+        for source in available_sources
+    )
 
 def extract_urls(text: str) -> List[str]:
     """Extract URLs from text."""
     if not text:
         return []
-    return re.findall(r'https?://\S+', text)
+    return _URL_RE.findall(text)
 
 def parse_source_selection(message: str, available_sources: List[str]) -> Optional[List[str]]:
     """Parse user's source selection from message."""
-    message_lower = message.lower()
-    
-    # Check for "all" or "everything"
-    if any(word in message_lower for word in ['all', 'everything', 'every']):
+    # Check for "all" or "everything" as whole words ("football" is not "all")
+    if _ALL_SOURCES_RE.search(message):
         return available_sources
     
     # Extract mentioned source types
-    selected = []
-    for source in available_sources:
-        source_name = source.replace('_', ' ')
-        if source in message_lower or source_name in message_lower:
-            selected.append(source)
+    selected = [
+        source for source, pattern in _source_patterns(tuple(available_sources))
+        if pattern.search(message)
+    ]
     
     return selected if selected else None
 
+@lru_cache(maxsize=1024)
 def format_metric_display(metric: str) -> str:
     """Format metric name for display."""
     return metric.replace('_', ' ').title()
 
-def calculate_freshness_score(last_updated: datetime) -> float:
-    """Calculate how fresh the data is (0-1, higher is fresher)."""
+def calculate_freshness_score(last_updated: datetime, now: Optional[datetime] = None) -> float:
+    """Calculate how fresh the data is (0-1, higher is fresher).
+    
+    Pass `now` to evaluate many timestamps against one clock reading.
+    """
     if not last_updated:
         return 0.0
     
-    age = datetime.now() - last_updated
+    age = (now or datetime.now()) - last_updated
     hours_old = age.total_seconds() / 3600
     
     # Fresh for first hour, decay over 24 hours
@@ -47,33 +66,32 @@ def calculate_freshness_score(last_updated: datetime) -> float:
     else:
         return max(0.0, 0.5 - (hours_old - 24) / 168 * 0.5)  # Decay to 0 over week
 
-def format_time_ago(dt: datetime) -> str:
-    """Format datetime as 'X minutes/hours/days ago'."""
+def format_time_ago(dt: datetime, now: Optional[datetime] = None) -> str:
+    """Format datetime as 'X minutes/hours/days ago'.
+    
+    Pass `now` to format many timestamps against one clock reading.
+    """
     if not dt:
         return "Never"
     
-    diff = datetime.now() - dt
+    seconds = ((now or datetime.now()) - dt).total_seconds()
     
-    if diff < timedelta(minutes=1):
+    if seconds < 60:
         return "Just now"
-    elif diff < timedelta(hours=1):
-        mins = int(diff.total_seconds() / 60)
+    elif seconds < 3600:
+        mins = int(seconds / 60)
         return f"{mins} minute{'s' if mins != 1 else ''} ago"
-    elif diff < timedelta(days=1):
-        hours = int(diff.total_seconds() / 3600)
+    elif seconds < 86400:
+        hours = int(seconds / 3600)
         return f"{hours} hour{'s' if hours != 1 else ''} ago"
     else:
-        days = diff.days
+        days = int(seconds // 86400)
         return f"{days} day{'s' if days != 1 else ''} ago"
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file system usage."""
-    # Remove invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    # Replace spaces with underscores
-    filename = filename.replace(' ', '_')
-    # Limit length
-    return filename[:200]
+    # Remove invalid characters and replace spaces in one pass, then limit length
+    return filename.translate(_FILENAME_TRANSLATION)[:200]
 
 def truncate_text(text: str, max_length: int = 1000) -> str:
     """Truncate text to max length with ellipsis."""
@@ -0,0 +1,44 @@
+"""On-disk cache for crawled pages with ETag / Last-Modified revalidation."""
+
+from typing import Dict, Mapping, Optional, Tuple
+import diskcache
+
+from config.settings import CACHE_DURATION, HTTP_CACHE_DIR
+
+# url -> {"etag", "last_modified", "title", "text"}; entries expire after CACHE_DURATION
+_cache = diskcache.Cache(HTTP_CACHE_DIR)
+
+def lookup(url: str) -> Optional[Dict[str, str]]:
+    """Return the cached entry for a URL, or None if missing or expired."""
+    return _cache.get(url)
+
+def conditional_headers(entry: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a cached entry."""
+    if not entry:
+        return {}
+    
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def cached_page(entry: Dict[str, str]) -> Tuple[str, str]:
+    """Return the (title, text) stored in a cached entry."""
+    return entry.get("title", ""), entry.get("text", "")
+
+def store(url: str, response_headers: Mapping[str, str], title: str, text: str) -> None:
+    """Cache extracted page content if the response can be revalidated."""
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    
+    # Without validators the server can never answer 304, so caching is useless
+    if not etag and not last_modified:
+        return
+    
+    _cache.set(
+        url,
+        {"etag": etag, "last_modified": last_modified, "title": title, "text": text},
+        expire=CACHE_DURATION
+    )
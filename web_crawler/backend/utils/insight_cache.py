@@ -0,0 +1,90 @@
+"""Semantic cache for insight answers about a chat's ranking table.
+
+Entries live on the chat dict itself (chat["insight_cache"]), so ChatStore
+persists them with the chat and every worker sees the same cache.
+"""
+
+from typing import Optional, Tuple
+import hashlib
+import numpy as np
+import pandas as pd
+
+from config.settings import INSIGHT_CACHE_MODEL, INSIGHT_CACHE_SIMILARITY
+
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+    print("⚠️  sentence-transformers not available; only repeated insight questions are cached. Install with: pip install sentence-transformers")
+
+_model = None
+
+def _get_model() -> "SentenceTransformer":
+    """Load the embedding model on first use."""
+    global _model
+    if _model is None:
+        _model = SentenceTransformer(INSIGHT_CACHE_MODEL)
+    return _model
+
+def _normalize(question: str) -> str:
+    """Normalize case and whitespace so trivially repeated questions match."""
+    return ' '.join(question.lower().split())
+
+def ranking_hash(df: pd.DataFrame) -> str:
+    """Fingerprint a ranking table; answers are only reused for the same table."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df).values)
+    digest.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+def embed(question: str) -> Optional[np.ndarray]:
+    """Return a unit-length embedding of the question, or None without a model."""
+    if not EMBEDDINGS_AVAILABLE:
+        return None
+    return _get_model().encode(question, normalize_embeddings=True)
+
+def lookup(
+    chat: dict,
+    table_hash: str,
+    question: str,
+    embedding: Optional[np.ndarray]
+) -> Optional[Tuple]:
+    """Return a cached answer to the same or a paraphrased question, if any."""
+    entry = chat.get("insight_cache")
+    if entry is None or entry["ranking_hash"] != table_hash:
+        return None
+    
+    answer = entry["exact"].get(_normalize(question))
+    if answer is not None or embedding is None or not entry["answers"]:
+        return answer
+    
+    # Embeddings are unit length, so the dot product is the cosine similarity
+    similarities = entry["embeddings"] @ embedding
+    best = int(np.argmax(similarities))
+    if similarities[best] >= INSIGHT_CACHE_SIMILARITY:
+        return entry["answers"][best]
+    return None
+
+def store(
+    chat: dict,
+    table_hash: str,
+    question: str,
+    embedding: Optional[np.ndarray],
+    answer: Tuple
+) -> None:
+    """Cache an answer on the chat, discarding entries for any older table.
+    
+    The entry is {"ranking_hash", "exact", "embeddings", "answers"}; it is saved
+    (and expires) along with the rest of the chat.
+    """
+    entry = chat.get("insight_cache")
+    if entry is None or entry["ranking_hash"] != table_hash:
+        entry = {"ranking_hash": table_hash, "exact": {}, "embeddings": None, "answers": []}
+    
+    entry["exact"][_normalize(question)] = answer
+    if embedding is not None:
+        row = embedding[np.newaxis, :]
+        entry["embeddings"] = row if entry["embeddings"] is None else np.vstack([entry["embeddings"], row])
+        entry["answers"].append(answer)
+    
+    chat["insight_cache"] = entry
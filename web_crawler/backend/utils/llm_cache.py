@@ -0,0 +1,34 @@
+"""On-disk exact-match cache for LLM completions."""
+
+from typing import Any, Optional
+import hashlib
+import diskcache
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+
+class DiskLLMCache(BaseCache):
+    """LangChain LLM cache backed by diskcache, shared by all worker processes.
+    
+    Entries are keyed by the exact prompt and the model's llm_string (model
+    name and sampling parameters) and expire after `ttl` seconds, so repeated
+    prompts are answered locally but are still re-asked periodically.
+    """
+    
+    def __init__(self, directory: str, ttl: int):
+        self._cache = diskcache.Cache(directory)
+        self._ttl = ttl
+    
+    def _key(self, prompt: str, llm_string: str) -> str:
+        """Hash the prompt and model settings into a compact cache key."""
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+    
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return cached generations, or None if missing or expired."""
+        return self._cache.get(self._key(prompt, llm_string))
+    
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations for a prompt."""
+        self._cache.set(self._key(prompt, llm_string), return_val, expire=self._ttl)
+    
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every cached completion."""
+        self._cache.clear()
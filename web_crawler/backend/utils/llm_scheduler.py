@@ -0,0 +1,93 @@
+"""Shared admission control for LLM calls from every chat and agent."""
+
+from typing import List, Optional
+import asyncio
+import heapq
+import itertools
+import time
+from aiolimiter import AsyncLimiter
+from langchain_core.globals import get_llm_cache
+from langchain_core.load import dumps
+from langchain_core.messages import BaseMessage
+from langchain_groq import ChatGroq
+
+class LLMScheduler:
+    """Runs LLM calls through one pool of slots, shortest prompt first.
+    
+    Up to `max_concurrent` calls are in flight at once across this process's
+    chats, all multiplexed over the shared Groq connection. When every slot is busy,
+    waiting calls are admitted by arrival time plus a delay proportional to
+    prompt length, so short prompts (planning steps, insight questions) overtake
+    long ones without starving them: a long prompt only yields to newer ones
+    for a bounded time. Admitted calls are also paced to `requests_per_minute`
+    to stay within Groq's rate limits; this is the process's only LLM gate, so
+    with several workers each one must be given its share of the app's limits.
+    """
+    
+    def __init__(
+        self,
+        llm: ChatGroq,
+        max_concurrent: int,
+        chars_per_second: int,
+        requests_per_minute: int
+    ):
+        self._llm = llm
+        self._rate = AsyncLimiter(requests_per_minute, 60)
+        self._free = max_concurrent
+        self._chars_per_second = chars_per_second
+        self._waiting: list = []  # heap of (priority, arrival order, future)
+        self._order = itertools.count()
+    
+    async def ainvoke(self, messages: List[BaseMessage], model: Optional[ChatGroq] = None):
+        """Invoke the LLM (or `model`, e.g. a cached variant) once a slot is free."""
+        llm = model or self._llm
+        
+        # Cache hits never reach Groq, so they skip the queue and the rate budget
+        cached = self._cached_reply(llm, messages)
+        if cached is not None:
+            return cached
+        
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        await self._acquire(time.monotonic() + prompt_chars / self._chars_per_second)
+        try:
+            await self._rate.acquire()
+            return await llm.ainvoke(messages)
+        finally:
+            self._release()
+    
+    def _cached_reply(self, llm: ChatGroq, messages: List[BaseMessage]) -> Optional[BaseMessage]:
+        """Return the completion cache's answer for a cache=True model, if any."""
+        llm_cache = get_llm_cache()
+        if not llm.cache or llm_cache is None:
+            return None
+        
+        # Same prompt and llm_string keys LangChain uses for its own cache lookup
+        generations = llm_cache.lookup(dumps(messages), llm._get_llm_string())
+        if isinstance(generations, list) and generations:
+            return generations[0].message
+        return None
+    
+    async def _acquire(self, priority: float) -> None:
+        """Take a slot, queueing by priority while none are free."""
+        if self._free > 0 and not self._waiting:
+            self._free -= 1
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as the caller was cancelled; pass it on
+                self._release()
+            raise
+    
+    def _release(self) -> None:
+        """Hand a slot to the highest-priority live waiter, or return it to the pool."""
+        while self._waiting:
+            _, _, waiter = heapq.heappop(self._waiting)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free += 1
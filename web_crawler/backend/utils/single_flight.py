@@ -0,0 +1,26 @@
+"""Collapse identical concurrent async calls into one."""
+
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+async def coalesce(
+    inflight: Dict[Hashable, "asyncio.Future[T]"],
+    key: Hashable,
+    make_call: Callable[[], Awaitable[T]]
+) -> T:
+    """Run make_call() once per key at a time; concurrent callers share its result.
+    
+    Keys only live in `inflight` while their call runs, so this dedupes work
+    that overlaps (duplicate candidates in one ranking, chats asking the same
+    thing at once) without caching anything itself.
+    """
+    future = inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(make_call())
+        inflight[key] = future
+        future.add_done_callback(lambda _: inflight.pop(key, None))
+    
+    # Shielded so one cancelled caller does not cancel the call for the others
+    return await asyncio.shield(future)